@@ -1,9 +1,13 @@
-
 from flask import Flask, request, jsonify, render_template
 import os
 import logging
 import traceback
+from dotenv import load_dotenv
+from surf_ai import runtime
 from surf_ai.engine import SurfAiEngine 
+from surf_ai.checkpoint_store import CheckpointNotFoundError
+
+load_dotenv()
 
 logging.basicConfig( 
     level=logging.DEBUG,  # Change to DEBUG for more verbosity
@@ -12,28 +16,66 @@ logging.basicConfig(
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
 
+# Started when the app is created, so that it runs under any server, not only `python app.py`.
+runtime.warm_up()
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+
+@app.route('/ready')
+def ready():
+    status = runtime.readiness()
+    return jsonify(status), 200 if status['ready'] else 503
+
     
 @app.route('/surf-ai', methods=['POST'])   
 def surf_ai():
+    session_id = None
     try:
         data = request.get_json() 
         chat_history = data.get('session_chat_history', [])
         prompt = chat_history[-1]['content']
-        surf_ai_engine = SurfAiEngine() 
-        result = surf_ai_engine.go_surf(prompt)
-        return jsonify({"assistant": result}), 200
+        session_id = data.get('session_id')
+        if session_id:
+            # Chat sessions keep their browser page between messages.
+            result = runtime.get_session_registry().run_turn(session_id, prompt, chat_history[:-1])
+        else:
+            surf_ai_engine = SurfAiEngine(browser_pool=runtime.get_browser_pool()) 
+            session_id = surf_ai_engine.session_id
+            try:
+                result = surf_ai_engine.go_surf(prompt)
+            finally:
+                surf_ai_engine.close()
+        return jsonify({"assistant": result, "session_id": session_id}), 200
     except Exception as e:
         logging.error("Exception occurred in /surf-ai: %s", str(e))
         logging.error(traceback.format_exc())
+        # session_id lets the caller continue from the last checkpoint via /surf-ai/resume
+        return jsonify({"error": f"Internal server error: {str(e)}", "session_id": session_id}), 500
+
+
+@app.route('/surf-ai/resume', methods=['POST'])
+def surf_ai_resume():
+    try:
+        data = request.get_json()
+        session_id = data.get('session_id')
+        if not session_id:
+            return jsonify({"error": "session_id is required"}), 400
+        result = runtime.get_session_registry().resume(session_id)
+        return jsonify({"assistant": result, "session_id": session_id}), 200
+    except CheckpointNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        logging.error("Exception occurred in /surf-ai/resume: %s", str(e))
+        logging.error(traceback.format_exc())
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
 if __name__ == '__main__':
     app.run(
         host='0.0.0.0',
         port=int(os.getenv('FLASK_PORT', 5000)),
-        debug=True
+        debug=True,
+        use_reloader=False  # the reloader would spawn a second process with its own browser pool
     )
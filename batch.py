@@ -0,0 +1,60 @@
+import argparse
+import logging
+import os
+import sys
+from dotenv import load_dotenv
+from surf_ai.batch_runner import BatchRunner, load_completed_ids, open_results, read_jobs
+
+load_dotenv()
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s %(levelname)s %(name)s %(threadName)s : %(message)s',
+    stream=sys.stderr
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run a JSONL file of SurfAi objectives concurrently and stream results as JSONL."
+    )
+    parser.add_argument("input", help="JSONL file of objectives, or '-' to read from stdin")
+    parser.add_argument("-o", "--output", help="JSONL results file (default: stdout)")
+    parser.add_argument(
+        "-c", "--concurrency", type=int,
+        default=int(os.getenv("SURF_AI_BATCH_CONCURRENCY", 4)),
+        help="Number of objectives (and browsers) running at the same time"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Skip objectives already completed in the output file, continue interrupted ones "
+             "from their last checkpoint and append new results to the output file"
+    )
+    args = parser.parse_args(argv)
+
+    if args.resume and not args.output:
+        parser.error("--resume requires --output")
+
+    skip_ids = load_completed_ids(args.output) if args.resume else set()
+    input_stream = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    output_stream = open_results(args.output, append=args.resume) if args.output else sys.stdout
+
+    runner = BatchRunner(concurrency=args.concurrency, resume_checkpoints=args.resume)
+    try:
+        summary = runner.run(read_jobs(input_stream), output_stream, skip_ids=skip_ids)
+    finally:
+        runner.close()
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+
+    logging.info(
+        "Batch finished: %d completed, %d failed, %d skipped",
+        summary["completed"], summary["failed"], summary["skipped"]
+    )
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
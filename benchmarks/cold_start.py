@@ -0,0 +1,110 @@
+"""
+Measures SurfAi cold start: time from process launch until the Flask app
+answers its first request, until /ready reports the browser pool and model
+client as warm, and (optionally) until a first /surf-ai objective completes.
+
+Usage:
+    python benchmarks/cold_start.py [--runs 3] [--port 5055] [--prompt "..."]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _get(url: str, timeout: float = 1.0):
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return None
+
+
+def _post_json(url: str, payload: dict, timeout: float):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.status
+
+
+def _wait_for(predicate, deadline: float, interval: float = 0.05) -> bool:
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(interval)
+    return False
+
+
+def measure_once(port: int, timeout: float, prompt: str = None) -> dict:
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, FLASK_PORT=str(port))
+    started = time.monotonic()
+    process = subprocess.Popen(
+        [sys.executable, "app.py"],
+        cwd=ROOT_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = started + timeout
+        result = {}
+        if not _wait_for(lambda: _get(f"{base_url}/") == 200, deadline):
+            raise TimeoutError("App did not start listening in time")
+        result["first_response_s"] = time.monotonic() - started
+
+        if not _wait_for(lambda: _get(f"{base_url}/ready") == 200, deadline):
+            raise TimeoutError("App did not become ready in time")
+        result["ready_s"] = time.monotonic() - started
+
+        if prompt:
+            request_started = time.monotonic()
+            _post_json(
+                f"{base_url}/surf-ai",
+                {"session_chat_history": [{"role": "user", "content": prompt}]},
+                timeout=max(1.0, deadline - request_started)
+            )
+            result["first_objective_s"] = time.monotonic() - started
+        return result
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark SurfAi time to first request.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds allowed per run")
+    parser.add_argument("--prompt", help="Optional objective to time a first end-to-end /surf-ai call")
+    args = parser.parse_args(argv)
+
+    runs = []
+    for index in range(args.runs):
+        run = measure_once(args.port, args.timeout, args.prompt)
+        runs.append(run)
+        print(f"run {index + 1}: " + ", ".join(f"{key}={value:.3f}" for key, value in run.items()))
+
+    for key in runs[0]:
+        values = [run[key] for run in runs]
+        print(f"{key}: median={statistics.median(values):.3f}s min={min(values):.3f}s max={max(values):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
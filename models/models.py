@@ -1,15 +1,8 @@
 import logging
 import os
+import threading
 import traceback
-from typing import List, Dict, Optional
-from openai import OpenAI
-import base64
-
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    handlers=[logging.StreamHandler()]
-)
+from typing import Callable, List, Dict, Optional
 
 # Override the openai logger so it doesn't print huge debug logs
 openai_logger = logging.getLogger("openai")
@@ -17,9 +10,28 @@ openai_logger.setLevel(logging.WARNING)
 
 logger = logging.getLogger(__name__)
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY environment variable is not set")
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Returns the shared OpenAI client, creating it on first use.
+
+    The openai package is imported here rather than at module load so that
+    importing this module stays cheap; the client (and its connection pool)
+    is then reused by every call instead of being rebuilt per request.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                api_key = os.getenv("OPENAI_API_KEY")
+                if not api_key:
+                    raise ValueError("OPENAI_API_KEY environment variable is not set")
+                from openai import OpenAI
+                _client = OpenAI(api_key=api_key)
+    return _client
 
 
 def call_model(
@@ -29,7 +41,8 @@ def call_model(
     image_base64: Optional[str] = None,
     image_extension: Optional[str] = None,
     model: str = "gpt-4o",
-    output_format: Optional[str] = "json_object"
+    output_format: Optional[str] = "json_object",
+    on_usage: Optional[Callable[[Dict[str, int]], None]] = None
 ) -> str:
     """
     Calls the OpenAI model with chat history and optionally an image URL.
@@ -38,9 +51,10 @@ def call_model(
     :param text_prompt: Optional text prompt to include.
     :param image_url: Optional URL to the image to include.
     :param model: The model to use for completion.
+    :param on_usage: Optional callback receiving the token usage of the call.
     :return: The model's response as a string.
     """
-    client = OpenAI(api_key=OPENAI_API_KEY)
+    client = get_client()
     try:
         content_list = []
 
@@ -96,6 +110,13 @@ def call_model(
                 temperature=0.0
             )
 
+        if on_usage and response.usage:
+            on_usage({
+                "prompt_tokens": response.usage.prompt_tokens,
+                "completion_tokens": response.usage.completion_tokens,
+                "total_tokens": response.usage.total_tokens
+            })
+
         answer = response.choices[0].message.content.strip() 
         return answer
 
@@ -106,8 +127,12 @@ def call_model(
     
 
 
-def create_embeddings(texts_to_embed: List[str], model: str = "text-embedding-ada-002") -> List[List[float]]: 
-    client = OpenAI(api_key=OPENAI_API_KEY)
+def create_embeddings(
+    texts_to_embed: List[str],
+    model: str = "text-embedding-ada-002",
+    on_usage: Optional[Callable[[Dict[str, int]], None]] = None
+) -> List[List[float]]: 
+    client = get_client()
     try:
         response = client.embeddings.create(
             model=model,
@@ -116,5 +141,12 @@ def create_embeddings(texts_to_embed: List[str], model: str = "text-embedding-ad
     except Exception as e:
         raise RuntimeError(f"Error while fetching embeddings from OpenAI: {e}")
 
+    if on_usage and response.usage:
+        on_usage({
+            "prompt_tokens": response.usage.prompt_tokens,
+            "completion_tokens": 0,
+            "total_tokens": response.usage.total_tokens
+        })
+
     embeddings = [entry.embedding for entry in response.data]
     return embeddings
@@ -0,0 +1,191 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, Set, TextIO
+from models.models import get_client
+from .browser_pool import BrowserPool
+from .checkpoint_store import CheckpointStore
+from .engine import SurfAiEngine
+
+logger = logging.getLogger(__name__)
+
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+def read_jobs(stream: TextIO) -> Iterator[Dict[str, str]]:
+    """
+    Reads objectives from a JSONL stream. Each line is either a JSON object
+    with an "objective" (or "prompt") and an optional "id", or a bare JSON
+    string. Jobs without an id are numbered by their line.
+
+    A line that cannot be run (invalid JSON, no objective, or an id already
+    used by an earlier line) is yielded with an "error" instead of an
+    objective, so that one bad line fails alone instead of the whole batch.
+    Ids must be unique because they key the job's checkpoint file.
+    """
+    seen = {}
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        job_id = f"line-{line_number}"
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield {"id": job_id, "error": f"Invalid JSON on line {line_number}: {e}"}
+            continue
+        if isinstance(item, str):
+            item = {"objective": item}
+        if not isinstance(item, dict):
+            yield {"id": job_id, "error": f"Expected an object or a string on line {line_number}"}
+            continue
+        job_id = str(item.get("id", job_id))
+        if job_id in seen:
+            yield {"id": job_id, "error": f"Duplicate id '{job_id}' on line {line_number} (first used on line {seen[job_id]})"}
+            continue
+        seen[job_id] = line_number
+        objective = item.get("objective") or item.get("prompt")
+        if not objective:
+            yield {"id": job_id, "error": f"Missing 'objective' on line {line_number}"}
+            continue
+        yield {"id": job_id, "objective": objective}
+
+
+def open_results(path: str, append: bool) -> TextIO:
+    """
+    Opens the results file. When appending after a line truncated by a
+    crash, the first new record starts on a fresh line instead of being
+    glued onto the fragment.
+    """
+    results = open(path, "a" if append else "w", encoding="utf-8")
+    if append and results.tell() > 0:
+        with open(path, "rb") as existing:
+            existing.seek(-1, os.SEEK_END)
+            if existing.read(1) != b"\n":
+                results.write("\n")
+    return results
+
+
+def load_completed_ids(path: str) -> Set[str]:
+    """Returns the ids already marked as completed in a previous output file."""
+    completed = set()
+    try:
+        with open(path, "r", encoding="utf-8") as results:
+            for line in results:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line truncated by a crash is simply re-run
+                if record.get("status") == COMPLETED:
+                    completed.add(record.get("id"))
+    except FileNotFoundError:
+        pass
+    return completed
+
+
+class BatchRunner:
+    """Runs objectives concurrently through SurfAiEngine, sharing browsers and the model client."""
+
+    def __init__(self, concurrency: int = 4, browser_pool: BrowserPool = None, resume_checkpoints: bool = False):
+        self.concurrency = max(1, concurrency)
+        self.browser_pool = browser_pool or BrowserPool(
+            size=self.concurrency,
+            max_size=int(os.getenv("SURF_AI_BROWSER_POOL_MAX_SIZE", 8))
+        )
+        self.resume_checkpoints = resume_checkpoints
+        self._write_lock = threading.Lock()
+
+    def run(self, jobs: Iterable[Dict[str, str]], output: TextIO, skip_ids: Set[str] = frozenset()) -> Dict[str, int]:
+        """
+        Runs the jobs as they are read, with at most `concurrency` in flight,
+        and writes each result as soon as its job finishes. Jobs are read
+        lazily, so a producer piping into stdin gets results while it is
+        still writing objectives.
+        """
+        get_client()  # fail fast on a missing API key before any browser work
+        self.browser_pool.start()
+        if os.getenv("SURF_AI_CHECKPOINTS", "1") != "0":
+            CheckpointStore().purge_expired()
+        summary = {COMPLETED: 0, FAILED: 0, "skipped": 0}
+        slots = threading.Semaphore(self.concurrency)
+
+        def run_and_write(job):
+            try:
+                record = self._run_job(job)
+                self._write(output, record)
+                with self._write_lock:
+                    summary[record["status"]] += 1
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="surf-ai-batch") as executor:
+            in_flight = set()
+            for job in jobs:
+                if "error" in job:
+                    logger.error("Batch job '%s' rejected: %s", job["id"], job["error"])
+                    self._write(output, {"id": job["id"], "status": FAILED, "error": job["error"], "steps": 0})
+                    with self._write_lock:
+                        summary[FAILED] += 1
+                    continue
+                if job["id"] in skip_ids:
+                    summary["skipped"] += 1
+                    continue
+                slots.acquire()
+                in_flight = self._reap(in_flight)
+                in_flight.add(executor.submit(run_and_write, job))
+            for future in in_flight:
+                future.result()
+
+        return summary
+
+    def close(self):
+        self.browser_pool.close()
+
+    def _run_job(self, job: Dict[str, str]) -> Dict:
+        started_at = datetime.now(timezone.utc).isoformat()
+        started = time.monotonic()
+        engine = SurfAiEngine(browser_pool=self.browser_pool, session_id=f"batch-{job['id']}")
+        record = {"id": job["id"], "objective": job["objective"], "started_at": started_at}
+        try:
+            if self._has_checkpoint(engine, job):
+                record["resumed"] = True
+                record["result"] = engine.resume()
+            else:
+                record["result"] = engine.go_surf(job["objective"])
+            record["status"] = COMPLETED
+        except Exception as e:
+            logger.error("Batch job '%s' failed: %s", job["id"], str(e))
+            record["status"] = FAILED
+            record["error"] = str(e)
+        finally:
+            engine.close()
+        record["steps"] = engine.step_count
+        if engine.json_task and engine.json_task.get("stopped_reason"):
+            record["stopped_reason"] = engine.json_task["stopped_reason"]
+        record["elapsed_seconds"] = round(time.monotonic() - started, 3)
+        return record
+
+    def _has_checkpoint(self, engine: SurfAiEngine, job: Dict[str, str]) -> bool:
+        if not self.resume_checkpoints or engine.checkpoint_store is None:
+            return False
+        checkpoint = engine.checkpoint_store.latest(engine.session_id)
+        # A checkpoint left by another batch that reused the same id is ignored.
+        return checkpoint is not None and engine.checkpoint_store.matches_prompt(checkpoint, job["objective"])
+
+    @staticmethod
+    def _reap(futures: Set[Future]) -> Set[Future]:
+        """Drops finished jobs, re-raising an error that prevented writing a result."""
+        for future in futures:
+            if future.done():
+                future.result()
+        return {future for future in futures if not future.done()}
+
+    def _write(self, output: TextIO, record: Dict):
+        with self._write_lock:
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
@@ -12,8 +12,9 @@ class BrowserManager:
         )
         return browser
 
-    def create_context(self, browser):
+    def create_context(self, browser, storage_state=None):
         context = browser.new_context(
+            storage_state=storage_state,
             viewport={'width': 1280, 'height': 960},
             device_scale_factor=1,
             bypass_csp=True,
@@ -28,4 +29,7 @@ class BrowserManager:
     def create_page(self, context):
         page = context.new_page()
         page.set_default_timeout(self.command_timeout)
-        return page
\ No newline at end of file
+        return page
+
+    def stop(self):
+        self.playwright.stop()
@@ -0,0 +1,169 @@
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from .browser_manager import BrowserManager
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserWorker:
+    """
+    Owns a Playwright instance and a launched browser on a dedicated thread.
+
+    Playwright's sync API is bound to the thread that started it, so every
+    browser operation for this worker is submitted as a job and executed on
+    the worker thread. The browser is launched once when the worker starts
+    and reused by every job. Jobs are short browser operations: sessions
+    submit one job per page interaction and wait for the model on their own
+    thread, so many sessions can share one worker.
+    """
+
+    def __init__(self, name: str, command_timeout: int):
+        self.name = name
+        self.command_timeout = command_timeout
+        self.browser_manager = None
+        self.browser = None
+        self.error = None
+        self.ready = threading.Event()
+        self.active = 0  # sessions currently running a turn on this worker; guarded by the pool lock
+        self._jobs = queue.Queue()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self):
+        self._thread.start()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Schedules fn(worker, *args, **kwargs) on the worker thread."""
+        future = Future()
+        with self._pending_lock:
+            self._pending += 1
+        self._jobs.put((future, fn, args, kwargs))
+        return future
+
+    def stop(self):
+        self._jobs.put(None)
+        self._thread.join()
+
+    def _run(self):
+        try:
+            self.browser_manager = BrowserManager(command_timeout=self.command_timeout)
+            self.browser = self.browser_manager.create_browser()
+            logger.debug("Browser worker '%s' is warm", self.name)
+        except Exception as e:
+            self.error = e
+            logger.exception("Browser worker '%s' failed to start", self.name)
+        finally:
+            self.ready.set()
+
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            future, fn, args, kwargs = job
+            try:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    self._ensure_browser()
+                    future.set_result(fn(self, *args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+            finally:
+                with self._pending_lock:
+                    self._pending -= 1
+
+        self._shutdown()
+
+    def _ensure_browser(self):
+        if self.error is not None:
+            raise RuntimeError(f"Browser worker '{self.name}' is unavailable: {self.error}")
+        if not self.browser.is_connected():
+            logger.warning("Browser of worker '%s' disconnected; relaunching", self.name)
+            self.browser = self.browser_manager.create_browser()
+
+    def _shutdown(self):
+        try:
+            if self.browser is not None:
+                self.browser.close()
+            if self.browser_manager is not None:
+                self.browser_manager.stop()
+        except Exception as e:
+            logger.debug(f"Browser worker shutdown failed: {str(e)}")
+
+
+class BrowserPool:
+    """
+    Browser workers shared by every engine in the process. `size` workers are
+    launched on start() so the first requests find a warm browser; when every
+    worker is busy with a running session, acquire() launches another one, up
+    to `max_size`. Workers added under load stay up for later bursts.
+    """
+
+    def __init__(self, size: int = 1, max_size: int = None, command_timeout: int = 10000):
+        self.size = max(1, size)
+        self.max_size = max(self.size, max_size or self.size)
+        self.command_timeout = command_timeout
+        self.workers = []
+        for _ in range(self.size):
+            self.workers.append(self._new_worker())
+        self._started = False
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Browser pool has been closed")
+            if not self._started:
+                for worker in self.workers:
+                    worker.start()
+                self._started = True
+        return self
+
+    def is_ready(self) -> bool:
+        warm = self.workers[:self.size]
+        return self._started and not self._closed and all(w.ready.is_set() and w.error is None for w in warm)
+
+    def acquire(self, worker: BrowserWorker = None) -> BrowserWorker:
+        """
+        Claims a worker for a session turn; pair every call with release().
+        A session whose browser context lives on a worker passes that worker
+        to keep using it. Otherwise the least busy worker is chosen, and a
+        new one is launched if all of them are running a turn.
+        """
+        self.start()
+        with self._lock:
+            if worker is None:
+                worker = min(self.workers, key=lambda w: (w.error is not None, w.active, w.pending))
+                if worker.active and len(self.workers) < self.max_size:
+                    worker = self._new_worker()
+                    worker.start()
+                    self.workers.append(worker)
+                    logger.debug("All browser workers busy; launched '%s'", worker.name)
+            worker.active += 1
+            return worker
+
+    def release(self, worker: BrowserWorker):
+        with self._lock:
+            worker.active -= 1
+
+    def run(self, fn, *args, worker: BrowserWorker, **kwargs):
+        """Runs fn(worker, *args, **kwargs) on a worker claimed with acquire() and returns its result."""
+        return worker.submit(fn, *args, **kwargs).result()
+
+    def close(self):
+        with self._lock:
+            if self._started and not self._closed:
+                for worker in self.workers:
+                    worker.stop()
+            self._closed = True
+
+    def _new_worker(self) -> BrowserWorker:
+        return BrowserWorker(f"surf-ai-browser-{len(self.workers)}", self.command_timeout)
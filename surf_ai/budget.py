@@ -0,0 +1,75 @@
+import hashlib
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+
+class SessionBudget:
+    """
+    Step, wall-time and token limits for one session. Branch engines share
+    their parent's budget, so the limits hold for the session as a whole.
+    A limit of 0 disables it.
+    """
+
+    def __init__(self, max_steps: int = 50, max_seconds: float = 1800, max_tokens: int = 1500000):
+        self.max_steps = max_steps
+        self.max_seconds = max_seconds
+        self.max_tokens = max_tokens
+        self.started = time.monotonic()
+        self.steps = 0
+        self.tokens = 0
+        self._lock = threading.Lock()
+
+    def record_step(self):
+        with self._lock:
+            self.steps += 1
+
+    def record_usage(self, usage: Dict[str, int]):
+        with self._lock:
+            self.tokens += usage.get("total_tokens", 0)
+
+    def tokens_exhausted(self) -> bool:
+        return bool(self.max_tokens) and self.tokens >= self.max_tokens
+
+    def exceeded(self) -> Optional[str]:
+        """Returns why the budget is exhausted, or None while there is budget left."""
+        if self.max_steps and self.steps >= self.max_steps:
+            return f"the step budget of {self.max_steps} steps was exhausted"
+        elapsed = time.monotonic() - self.started
+        if self.max_seconds and elapsed >= self.max_seconds:
+            return f"the time budget of {self.max_seconds:.0f} seconds was exhausted"
+        if self.tokens_exhausted():
+            return f"the token budget of {self.max_tokens} tokens was exhausted ({self.tokens} used)"
+        return None
+
+
+class LoopDetector:
+    """
+    Fingerprints each step as the (commands, resulting page state) pair and
+    detects when the planner is stuck: the same pair repeating within the
+    recent window, or the recent steps cycling with a period of 2 or 3
+    (e.g. oscillating between two pages).
+    """
+
+    def __init__(self, window: int = 8, max_repeats: int = 3):
+        self.max_repeats = max_repeats
+        self.history = deque(maxlen=window)
+
+    def record(self, commands: str, page_state: str) -> Optional[str]:
+        normalized = " ".join(str(commands).split())
+        fingerprint = hashlib.sha1(f"{normalized}\n{page_state}".encode("utf-8")).hexdigest()
+        self.history.append(fingerprint)
+
+        repeats = self.history.count(fingerprint)
+        if repeats >= self.max_repeats:
+            return f"the command `{normalized[:200]}` was executed {repeats} times on the same page state without progress"
+
+        steps = list(self.history)
+        for period in (2, 3):
+            if len(steps) >= 2 * period and len(set(steps[-period:])) == period and steps[-period:] == steps[-2 * period:-period]:
+                return f"the last {2 * period} steps are cycling between the same {period} actions and pages"
+        return None
+
+    def reset(self):
+        self.history.clear()
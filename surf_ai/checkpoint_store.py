@@ -0,0 +1,236 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Kept once a session completes: enough to return and merge its results.
+# Commands, descriptions and objectives are dropped, as they can carry the
+# credentials typed into forms.
+_COMPLETED_TASK_FIELDS = ("task_name", "data_extraction")
+_COMPLETED_BRANCH_FIELDS = ("branch_name", "status", "stopped_reason", "error")
+
+
+def _digest(value) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class CheckpointNotFoundError(LookupError):
+    pass
+
+
+class CheckpointStore:
+    """
+    Append-only, one JSONL file per session. Every step appends one compact
+    record and flushes it to disk, so a crash can lose at most the line that
+    was being written; a truncated last line is ignored when reading.
+
+    Records only carry what changed since the previous record of the session:
+    the tasks from the first one that changed, the new execution log lines,
+    and the browser storage state (cookies and local storage) when it differs.
+    latest() replays the file to rebuild the full state.
+
+    When a session completes, its file is rewritten to a single record with
+    the final answer and the extracted data. The prompt, commands, logs and
+    storage state are dropped, as they can contain credentials.
+
+    purge_expired() deletes completed files older than completed_ttl_seconds
+    and unfinished ones (stopped, failed or abandoned, which still hold the
+    full state) not written for ttl_seconds. A TTL of 0 keeps files forever.
+    """
+
+    def __init__(self, directory: str = None, max_logs: int = 20,
+                 ttl_seconds: float = None, completed_ttl_seconds: float = None):
+        self.directory = directory or os.getenv("SURF_AI_CHECKPOINT_DIR", "./surf_ai/checkpoints")
+        self.max_logs = max_logs
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("SURF_AI_CHECKPOINT_TTL_SECONDS", 259200))
+        if completed_ttl_seconds is None:
+            completed_ttl_seconds = float(os.getenv("SURF_AI_COMPLETED_CHECKPOINT_TTL_SECONDS", 86400))
+        self.ttl_seconds = ttl_seconds
+        self.completed_ttl_seconds = completed_ttl_seconds
+        self._written = {}  # session_id -> digests of the state already in the file
+        self._lock = threading.Lock()
+
+    def path(self, session_id: str) -> str:
+        safe_id = re.sub(r"[^A-Za-z0-9_.-]", "_", session_id)
+        return os.path.join(self.directory, f"{safe_id}.jsonl")
+
+    @staticmethod
+    def matches_prompt(checkpoint: Dict, prompt: str) -> bool:
+        """True if the checkpoint was written for this prompt, also after completion."""
+        return checkpoint.get("prompt") == prompt or checkpoint.get("prompt_sha1") == _digest(prompt)
+
+    def append(self, session_id: str, record: Dict):
+        if record.get("status") == "completed":
+            self._compact(session_id, record)
+            return
+
+        with self._lock:
+            written = self._written.get(session_id, {})
+            if written and not os.path.exists(self.path(session_id)):
+                written = {}  # the file expired meanwhile: start again from a full record
+            record, state = self._delta(record, written)
+            self._write(self.path(session_id), [record], mode="a")
+            self._written[session_id] = state
+
+    def latest(self, session_id: str) -> Optional[Dict]:
+        latest, tasks, logs, storage_state = None, [], [], None
+        try:
+            with open(self.path(session_id), "r", encoding="utf-8") as checkpoints:
+                for line in checkpoints:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    latest = record
+                    if "tasks" in record:
+                        tasks = tasks[:record.get("tasks_from", 0)] + record["tasks"]
+                    if "logs_from" in record:
+                        logs = logs[:record["logs_from"]] + record.get("execution_logs", [])
+                    if "storage_state" in record:
+                        storage_state = record["storage_state"]
+        except FileNotFoundError:
+            return None
+        if latest is None:
+            return None
+
+        if "tasks" in latest:
+            latest["json_task"] = dict(latest.get("json_task") or {}, tasks=tasks)
+            latest.pop("tasks")
+            latest.pop("tasks_from", None)
+        if "logs_from" in latest:
+            latest["execution_logs"] = logs[-self.max_logs:]
+            latest.pop("logs_from")
+        if storage_state is not None and latest.get("status") != "completed":
+            latest["storage_state"] = storage_state
+        return latest
+
+    def purge_expired(self) -> int:
+        """Deletes the checkpoint files past their retention and returns how many were deleted."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0
+        now = time.time()
+        removed = 0
+        for name in names:
+            if not name.endswith((".jsonl", ".jsonl.tmp")):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                ttl = self.completed_ttl_seconds if self._is_completed(path) else self.ttl_seconds
+                if ttl and now - os.path.getmtime(path) > ttl:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                continue  # removed or compacted concurrently
+        return removed
+
+    @staticmethod
+    def _is_completed(path: str) -> bool:
+        status = None
+        with open(path, "r", encoding="utf-8") as checkpoints:
+            for line in checkpoints:
+                try:
+                    status = json.loads(line).get("status")
+                except (json.JSONDecodeError, AttributeError):
+                    continue
+        return status == "completed"
+
+    def _delta(self, record: Dict, written: Dict) -> Tuple[Dict, Dict]:
+        record = dict(record)
+        state = {}
+
+        json_task = record.get("json_task")
+        if json_task and isinstance(json_task.get("tasks"), list):
+            digests = [_digest(task) for task in json_task["tasks"]]
+            start = self._common_prefix(written.get("tasks", []), digests)
+            record["json_task"] = {key: value for key, value in json_task.items() if key != "tasks"}
+            record["tasks_from"] = start
+            record["tasks"] = json_task["tasks"][start:]
+            state["tasks"] = digests
+
+        logs = record.pop("execution_logs", None)
+        if logs is not None:
+            digests = [_digest(line) for line in logs]
+            start = self._common_prefix(written.get("logs", []), digests)
+            record["logs_from"] = start
+            record["execution_logs"] = logs[start:]
+            state["logs"] = digests
+
+        storage_state = record.pop("storage_state", None)
+        state["storage_state"] = written.get("storage_state")
+        if storage_state is not None:
+            digest = _digest(storage_state)
+            if digest != state["storage_state"]:
+                record["storage_state"] = storage_state
+                state["storage_state"] = digest
+        return record, state
+
+    @staticmethod
+    def _common_prefix(previous: List[str], current: List[str]) -> int:
+        length = 0
+        for old, new in zip(previous, current):
+            if old != new:
+                break
+            length += 1
+        return length
+
+    def _compact(self, session_id: str, record: Dict):
+        compacted = {
+            "session_id": record.get("session_id", session_id),
+            "status": record["status"],
+            "step": record.get("step"),
+            "created_at": record.get("created_at"),
+            "prompt_sha1": _digest(record["prompt"]) if record.get("prompt") is not None else None,
+            "json_task": self._strip_json_task(record.get("json_task")),
+            "final_answer": record.get("final_answer"),
+        }
+        path = self.path(session_id)
+        with self._lock:
+            # Written next to the file and swapped in, so a crash leaves either
+            # the full history or the compacted record, never a mix.
+            self._write(path + ".tmp", [compacted], mode="w")
+            os.replace(path + ".tmp", path)
+            self._written.pop(session_id, None)
+
+    @staticmethod
+    def _strip_json_task(json_task: Optional[Dict]) -> Optional[Dict]:
+        if not json_task:
+            return json_task
+
+        def strip_tasks(tasks):
+            return [{key: task[key] for key in _COMPLETED_TASK_FIELDS if key in task} for task in tasks or []]
+
+        stripped = {key: value for key, value in json_task.items() if key not in ("tasks", "branches")}
+        if "tasks" in json_task:
+            stripped["tasks"] = strip_tasks(json_task["tasks"])
+        if "branches" in json_task:
+            stripped["branches"] = [
+                dict({key: branch[key] for key in _COMPLETED_BRANCH_FIELDS if key in branch}, tasks=strip_tasks(branch.get("tasks")))
+                for branch in json_task["branches"]
+            ]
+        return stripped
+
+    def _write(self, path: str, records: List[Dict], mode: str):
+        os.makedirs(self.directory, exist_ok=True)
+        # A line truncated by a crash must not swallow the next record.
+        prefix = "\n" if mode == "a" and not self._ends_with_newline(path) else ""
+        with open(path, mode, encoding="utf-8") as checkpoints:
+            checkpoints.write(prefix)
+            for record in records:
+                checkpoints.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            checkpoints.flush()
+            os.fsync(checkpoints.fileno())
+
+    @staticmethod
+    def _ends_with_newline(path: str) -> bool:
+        try:
+            with open(path, "rb") as checkpoints:
+                checkpoints.seek(-1, os.SEEK_END)
+                return checkpoints.read(1) == b"\n"
+        except OSError:  # missing or empty file
+            return True
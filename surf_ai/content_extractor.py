@@ -0,0 +1,244 @@
+import hashlib
+import math
+import os
+import re
+import threading
+from array import array
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Sequence
+from models.models import create_embeddings
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class EmbeddingCache:
+    """
+    Thread-safe LRU cache of embeddings keyed by model and text hash. Vectors
+    are stored as 32-bit float arrays, about 6 KB for a 1536-dimension
+    embedding instead of about 50 KB as a list of Python floats.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(model: str, text: str) -> str:
+        return model + ":" + hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[Sequence[float]]]:
+        with self._lock:
+            found = []
+            for text in texts:
+                key = self._key(model, text)
+                embedding = self._entries.get(key)
+                if embedding is not None:
+                    self._entries.move_to_end(key)
+                found.append(embedding)
+            return found
+
+    def put_many(self, model: str, texts: List[str], embeddings: List[List[float]]):
+        with self._lock:
+            for text, embedding in zip(texts, embeddings):
+                self._entries[self._key(model, text)] = array("f", embedding)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# Shared by every engine in the process: the same pages and objectives come
+# back across steps and sessions, and embeddings never change for a text.
+embedding_cache = EmbeddingCache(max_entries=int(os.getenv("SURF_AI_EMBEDDING_CACHE_SIZE", 2048)))
+
+
+class ContentExtractor:
+    """
+    Extracts the readable text and tables of a page, splits them into chunks
+    and keeps only the chunks most relevant to the objective. Chunks are
+    ranked by embedding similarity, falling back to lexical overlap when
+    embeddings are disabled or unavailable (e.g. offline).
+    """
+
+    def __init__(self, logger, top_k: int = 5, chunk_size: int = 800, max_chunks: int = 300):
+        self.logger = logger
+        self.top_k = top_k
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.use_embeddings = os.getenv("SURF_AI_CONTENT_EMBEDDINGS", "1") != "0"
+
+    def extract(self, page) -> Optional[Dict]:
+        """Reads the page's text blocks and tables; the only step that touches the browser."""
+        if self.top_k <= 0:
+            return None
+        try:
+            return page.evaluate(self._extract_script())
+        except Exception as e:
+            self.logger.debug(f"Content extraction failed: {str(e)}")
+            return {}
+
+    def select_relevant(self, content: Optional[Dict], objective: str, on_usage=None) -> str:
+        """Chunks and ranks extracted content; may call the embeddings API, reporting its usage to on_usage."""
+        if content is None:
+            return "CONTENT_DISABLED"
+        if not content:
+            return "CONTENT_UNAVAILABLE"
+
+        chunks = self._chunk(content)
+        if not chunks:
+            return "NO_READABLE_CONTENT"
+
+        scores = self._rank(chunks, objective, on_usage)
+        best = sorted(range(len(chunks)), key=lambda i: scores[i], reverse=True)[:self.top_k]
+        # Keep page order so that the selected chunks read naturally.
+        selected = sorted(best)
+        header = f"<!-- {len(selected)} most relevant of {len(chunks)} content chunks from '{content.get('title', '')}' -->"
+        return header + "\n" + "\n\n".join(
+            f"[chunk {index + 1}, relevance {scores[index]:.2f}]\n{chunks[index]}" for index in selected
+        )
+
+    def _chunk(self, content: Dict) -> List[str]:
+        chunks = []
+        heading, body, length = "", [], 0
+
+        def section():
+            return "\n".join(([heading] if heading else []) + body)
+
+        for block in content.get("blocks", []):
+            if block["type"] == "heading":
+                if body:
+                    chunks.append(section())
+                heading, body, length = "# " + block["text"], [], 0
+                continue
+            for piece in self._split(block["text"]):
+                if body and length + len(piece) > self.chunk_size:
+                    chunks.append(section())
+                    body, length = [], 0
+                body.append(piece)
+                length += len(piece) + 1
+        if body:
+            chunks.append(section())
+
+        for table in content.get("tables", []):
+            chunks.extend(self._chunk_table(table))
+
+        return chunks[:self.max_chunks]
+
+    def _split(self, text: str) -> List[str]:
+        if len(text) <= self.chunk_size:
+            return [text]
+        sentences = re.split(r"(?<=[.!?])\s+", text)
+        pieces, piece = [], ""
+        for sentence in sentences:
+            while len(sentence) > self.chunk_size:
+                pieces.append(sentence[:self.chunk_size])
+                sentence = sentence[self.chunk_size:]
+            if piece and len(piece) + len(sentence) + 1 > self.chunk_size:
+                pieces.append(piece)
+                piece = ""
+            piece = f"{piece} {sentence}".strip()
+        if piece:
+            pieces.append(piece)
+        return pieces
+
+    def _chunk_table(self, table: Dict) -> List[str]:
+        rows = [" | ".join(cells) for cells in table.get("rows", [])]
+        if not rows:
+            return []
+        caption = f"Table: {table['caption']}\n" if table.get("caption") else "Table:\n"
+        header, body = rows[0], rows[1:]
+        chunks, current = [], [header]
+        for row in body:
+            if sum(len(r) + 1 for r in current) + len(row) > self.chunk_size and len(current) > 1:
+                chunks.append(caption + "\n".join(current))
+                current = [header]  # repeat the header so every chunk stays self-describing
+            current.append(row)
+        chunks.append(caption + "\n".join(current))
+        return chunks
+
+    def _rank(self, chunks: List[str], objective: str, on_usage=None) -> List[float]:
+        if self.use_embeddings:
+            try:
+                return self._embedding_scores(chunks, objective, on_usage)
+            except Exception as e:
+                self.logger.debug(f"Embedding ranking unavailable, using lexical ranking: {str(e)}", extra={'no_memory': True})
+        return self._lexical_scores(chunks, objective)
+
+    def _embedding_scores(self, chunks: List[str], objective: str, on_usage=None) -> List[float]:
+        texts = [objective] + chunks
+        embeddings = embedding_cache.get_many(EMBEDDING_MODEL, texts)
+        missing = [text for text, embedding in zip(texts, embeddings) if embedding is None]
+        if missing:
+            missing = list(dict.fromkeys(missing))
+            fetched = create_embeddings(missing, model=EMBEDDING_MODEL, on_usage=on_usage)
+            embedding_cache.put_many(EMBEDDING_MODEL, missing, fetched)
+            by_text = dict(zip(missing, fetched))
+            embeddings = [embedding if embedding is not None else by_text[text] for text, embedding in zip(texts, embeddings)]
+        query, vectors = embeddings[0], embeddings[1:]
+        return [self._cosine(query, vector) for vector in vectors]
+
+    @staticmethod
+    def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+        dot = sum(x * y for x, y in zip(a, b))
+        norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+        return dot / norm if norm else 0.0
+
+    @staticmethod
+    def _tokens(text: str) -> List[str]:
+        return [token for token in _TOKEN_PATTERN.findall(text.lower()) if len(token) > 1]
+
+    def _lexical_scores(self, chunks: List[str], objective: str) -> List[float]:
+        # BM25 over the page's own chunks: no network, no external index.
+        k1, b = 1.5, 0.75
+        query_terms = set(self._tokens(objective))
+        documents = [Counter(self._tokens(chunk)) for chunk in chunks]
+        average_length = sum(sum(d.values()) for d in documents) / len(documents) or 1.0
+        document_frequency = Counter(term for d in documents for term in d if term in query_terms)
+        scores = []
+        for document in documents:
+            length = sum(document.values())
+            score = 0.0
+            for term in query_terms:
+                frequency = document.get(term, 0)
+                if not frequency:
+                    continue
+                idf = math.log(1 + (len(documents) - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+                score += idf * frequency * (k1 + 1) / (frequency + k1 * (1 - b + b * length / average_length))
+            scores.append(score)
+        return scores
+
+    def _extract_script(self):
+        return """
+            () => {
+                const root = document.querySelector('main, article, [role="main"]') || document.body;
+                const skip = 'nav, footer, aside, script, style, noscript, template, svg, [aria-hidden="true"], .surf-ai-highlight-overlay';
+                const clean = text => (text || '').replace(/\\s+/g, ' ').trim();
+                const isVisible = el => {
+                    const style = window.getComputedStyle(el);
+                    return style.display !== 'none' && style.visibility !== 'hidden' && el.getClientRects().length > 0;
+                };
+
+                const blocks = [];
+                root.querySelectorAll('h1, h2, h3, h4, h5, h6, p, li, blockquote, pre, dt, dd, figcaption').forEach(el => {
+                    if (el.closest(skip) || el.closest('table') || !isVisible(el)) return;
+                    // Leaf-most blocks only, so nested list items are not emitted twice.
+                    if (el.tagName === 'LI' && el.querySelector('p, li')) return;
+                    const text = clean(el.innerText);
+                    if (text.length < 2) return;
+                    blocks.push({type: /^H[1-6]$/.test(el.tagName) ? 'heading' : 'text', text});
+                });
+
+                const tables = [];
+                root.querySelectorAll('table').forEach(table => {
+                    if (table.closest(skip) || !isVisible(table)) return;
+                    const rows = Array.from(table.rows)
+                        .map(row => Array.from(row.cells).map(cell => clean(cell.innerText)))
+                        .filter(cells => cells.some(cell => cell));
+                    if (rows.length) {
+                        tables.push({caption: table.caption ? clean(table.caption.innerText) : '', rows});
+                    }
+                });
+
+                return {title: document.title, url: location.href, blocks, tables};
+            }
+        """
@@ -0,0 +1,78 @@
+import hashlib
+import json
+from typing import Dict, List
+
+
+class DomDiff:
+    """
+    Renders the highlighted elements of a page as a delta against the
+    previous step. A full snapshot is produced on the first step and after
+    every navigation (new document or URL); otherwise only added, changed
+    and removed elements are sent in full, and elements that did not change
+    are listed as a compact one-line index so their numbers stay usable.
+    """
+
+    def __init__(self):
+        self.document_id = None
+        self.url = None
+        self.previous = {}
+
+    def reset(self):
+        self.document_id = None
+        self.url = None
+        self.previous = {}
+
+    def render(self, snapshot: Dict) -> str:
+        elements = {element["number"]: element for element in snapshot["elements"]}
+        navigated = (
+            not self.previous
+            or snapshot.get("documentId") != self.document_id
+            or snapshot.get("url") != self.url
+        )
+        if navigated:
+            text = self._render_full(elements)
+        else:
+            text = self._render_delta(elements)
+
+        self.document_id = snapshot.get("documentId")
+        self.url = snapshot.get("url")
+        self.previous = {number: element["html"] for number, element in elements.items()}
+        return text
+
+    def fingerprint(self) -> str:
+        """Hash of the page state last rendered: URL plus every visible element."""
+        state = json.dumps([self.url, sorted(self.previous.items())], ensure_ascii=False)
+        return hashlib.sha1(state.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _render_full(elements: Dict[int, Dict]) -> str:
+        return f"<!-- Visible Interactive Elements ({len(elements)}) -->\n" + "\n".join(
+            element["html"] for element in elements.values()
+        )
+
+    def _render_delta(self, elements: Dict[int, Dict]) -> str:
+        added = [number for number in elements if number not in self.previous]
+        changed = [number for number in elements if number in self.previous and self.previous[number] != elements[number]["html"]]
+        removed = sorted(number for number in self.previous if number not in elements)
+        unchanged = [number for number in elements if number not in added and number not in changed]
+
+        if not added and not changed and not removed:
+            header = f"<!-- Page unchanged since the previous step: {len(elements)} visible elements kept their numbers -->"
+        else:
+            header = (
+                f"<!-- Page update since the previous step: {len(added)} added, {len(changed)} changed, "
+                f"{len(removed)} no longer visible, {len(unchanged)} unchanged. Numbers are stable across steps. -->"
+            )
+        sections = [header]
+        sections += self._section("Added elements", [elements[n]["html"] for n in added])
+        sections += self._section("Changed elements", [elements[n]["html"] for n in changed])
+        if removed:
+            sections.append("<!-- No longer visible: " + ", ".join(str(n) for n in removed) + " -->")
+        sections += self._section("Unchanged elements (summary)", [f"{n}: {elements[n]['summary']}" for n in unchanged])
+        return "\n".join(sections)
+
+    @staticmethod
+    def _section(title: str, lines: List[str]) -> List[str]:
+        if not lines:
+            return []
+        return [f"<!-- {title} ({len(lines)}) -->"] + lines
@@ -3,8 +3,8 @@ class ElementHighlighter:
         self.logger = logger
 
     def apply_highlight(self, page):
+        # The caller waits for the page to settle first, off the browser thread.
         try:
-            page.wait_for_timeout(2000)
             page.evaluate(self._highlight_script())
         except Exception as e:
             self.logger.debug(f"Highlight failed: {str(e)}")
@@ -20,14 +20,43 @@ class ElementHighlighter:
     def _highlight_script(self):
         return """
             (function() {
-                let counter = 1;
-                const getRandomColor = () => {
-                    const hue = Math.floor(Math.random() * 360);
-                    const saturation = 70 + Math.floor(Math.random() * 20);
-                    const lightness = 30 + Math.floor(Math.random() * 10);
-                    return `hsl(${hue}, ${saturation}%, ${lightness}%)`;
+                // Numbering state lives on the window, so it survives between
+                // steps on the same document and resets on navigation.
+                const state = window.__surfAiHighlight || (window.__surfAiHighlight = {
+                    documentId: Date.now().toString(36) + Math.random().toString(36).slice(2),
+                    nextNumber: 1,
+                    fingerprints: {},
+                    ambiguous: {}
+                });
+
+                // Stable color per number, so a persisting element keeps its look too.
+                const getColor = number => {
+                    const hue = Math.round(number * 137.508) % 360;
+                    const lightness = 30 + (number % 3) * 5;
+                    return `hsl(${hue}, 80%, ${lightness}%)`;
+                };
+
+                // Identifies an element across re-renders that replace the DOM node.
+                // The text of the enclosing list item or row tells apart repeated
+                // controls such as the "Add to cart" button of each product.
+                const fingerprint = el => {
+                    const item = el.parentElement && el.parentElement.closest('li, tr, article, [role="listitem"], [role="row"], [role="article"]');
+                    return [
+                        el.tagName,
+                        el.id,
+                        el.getAttribute('name'),
+                        el.getAttribute('type'),
+                        el.getAttribute('role'),
+                        el.getAttribute('aria-label'),
+                        el.getAttribute('href'),
+                        el.getAttribute('placeholder'),
+                        (el.innerText || '').trim().slice(0, 40),
+                        item ? (item.innerText || '').replace(/\\s+/g, ' ').trim().slice(0, 80) : ''
+                    ].join('|');
                 };
 
+                const isTaken = number => document.querySelector(`[data-highlight-number="${number}"]`) !== null;
+
                 const interactiveSelectors = [ 
                     'input', 'textarea', 'button', 'select', 'output',
                     'a[href]', 'area[href]',
@@ -45,21 +74,44 @@ class ElementHighlighter:
                     'iframe', 'object', 'embed' 
                 ];
 
-                // Select only visible, interactive elements that haven't been highlighted yet.
+                // Select only visible, interactive elements.
                 const elements = Array.from(document.querySelectorAll('*')).filter(el => {
                     const style = window.getComputedStyle(el);
                     return style.display !== 'none' &&
                         style.visibility === 'visible' &&
                         el.offsetParent !== null &&
-                        interactiveSelectors.some(selector => el.matches(selector)) &&
-                        !el.dataset.highlightNumber;
+                        !el.classList.contains('surf-ai-highlight-overlay') &&
+                        interactiveSelectors.some(selector => el.matches(selector));
                 });
 
-                elements.forEach(el => {
-                    // Assign a unique highlight number without modifying element layout.
-                    const number = counter++;
-                    el.dataset.highlightNumber = number;
-                    const color = getRandomColor();
+                // A fingerprint shared by several elements cannot tell them apart, so
+                // its number is never handed to a re-rendered node: after a re-sort
+                // the node could be a different item with the same HTML.
+                const keys = elements.map(fingerprint);
+                const counts = {};
+                keys.forEach(key => { counts[key] = (counts[key] || 0) + 1; });
+                keys.forEach(key => { if (counts[key] > 1) state.ambiguous[key] = true; });
+
+                const seen = new Set();
+                elements.forEach((el, index) => {
+                    // Elements that were already numbered keep their number; re-rendered
+                    // nodes get their previous number back through their fingerprint.
+                    const key = keys[index];
+                    let number = el.dataset.highlightNumber ? parseInt(el.dataset.highlightNumber, 10) : null;
+                    if (number !== null && seen.has(number)) {
+                        number = state.nextNumber++;  // a cloned node carried the attribute over
+                        el.dataset.highlightNumber = number;
+                    }
+                    if (number === null) {
+                        const known = state.ambiguous[key] ? null : state.fingerprints[key];
+                        number = known && !isTaken(known) ? known : state.nextNumber++;
+                        el.dataset.highlightNumber = number;
+                    }
+                    seen.add(number);
+                    if (!state.ambiguous[key]) {
+                        state.fingerprints[key] = number;
+                    }
+                    const color = getColor(number);
 
                     // Get the element's position and size.
                     const rect = el.getBoundingClientRect();
@@ -67,7 +119,7 @@ class ElementHighlighter:
                     // Create an overlay using fixed positioning.
                     const overlay = document.createElement('div');
                     overlay.className = 'surf-ai-highlight-overlay';
-                    overlay.dataset.highlightNumber = number;
+                    overlay.dataset.overlayNumber = number;
                     overlay.style.position = 'fixed';
                     overlay.style.top = rect.top + 'px';
                     overlay.style.left = rect.left + 'px';
@@ -107,11 +159,10 @@ class ElementHighlighter:
     def _remove_highlight_script(self):
         return """
             (function() {
+                // Only the overlays are removed: elements keep their data-highlight-number
+                // so that numbering stays stable for elements that persist between steps.
                 document.querySelectorAll('.surf-ai-highlight-overlay').forEach(overlay => {
                     overlay.parentNode.removeChild(overlay);
                 });
-                document.querySelectorAll('[data-highlight-number]').forEach(el => {
-                    delete el.dataset.highlightNumber;
-                });
             })();
         """  
\ No newline at end of file
@@ -1,57 +1,394 @@
 import os
 import time
 import json
-from dotenv import load_dotenv
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 from models.models import call_model
-from .browser_manager import BrowserManager
 from .command_executor import CommandExecutor
 from .element_highlighter import ElementHighlighter
 from .screenshot_manager import ScreenshotManager 
+from .content_extractor import ContentExtractor
 from .json_handler import JsonResponseHandler
 from .logging_handler import LoggingConfigurator
-from surf_ai.prompt import GEN_JSON_TASK_PROMPT, GEN_JSON_TASK_LOOP_PROMPT, FINAL_ANSWER_PROMPT
+from .checkpoint_store import CheckpointStore, CheckpointNotFoundError
+from .budget import SessionBudget, LoopDetector
+from .runtime import get_browser_pool
+from surf_ai.prompt import GEN_JSON_TASK_PROMPT, GEN_JSON_TASK_LOOP_PROMPT, FINAL_ANSWER_PROMPT, BRANCHING_GUIDELINES, CONVERSATION_CONTEXT, LOOP_HINT
 
 class SurfAiEngine:
-    def __init__(self):
-        load_dotenv()
+    def __init__(self, browser_pool=None, session_id: str = None, checkpoint_store: CheckpointStore = None, is_branch: bool = False, keep_alive: bool = False, budget: SessionBudget = None):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.is_branch = is_branch
+        # With keep_alive the browser context and page survive between go_surf
+        # calls, so a follow-up message continues from the live page.
+        self.keep_alive = keep_alive
+        self.worker = None
+        self.context = None
+        self.page = None
+        self.memory_bytes = 0
         self.execution_logs = [] 
         self.logger = LoggingConfigurator.configure_logger(self.execution_logs)
-        self.json_task_model = os.getenv("SURF_AI_JSON_TASK_MODEL")
-        self.browser_manager = BrowserManager(command_timeout=10000)
+        self.json_task_model = os.getenv("SURF_AI_JSON_TASK_MODEL", "gpt-4o")
+        self.browser_pool = browser_pool or get_browser_pool()
+        if checkpoint_store is None and os.getenv("SURF_AI_CHECKPOINTS", "1") != "0":
+            checkpoint_store = CheckpointStore()
+        self.checkpoint_store = checkpoint_store
         self.command_executor = CommandExecutor(self.logger)
         self.highlighter = ElementHighlighter(self.logger)
         self.screenshot_manager = ScreenshotManager(truncation_length=400000)
+        self.content_extractor = ContentExtractor(self.logger, top_k=int(os.getenv("SURF_AI_CONTENT_TOP_K", 5)))
         self.max_retries = 2      
         self.retry_backoff = 2000 
+        self.max_concurrent_branches = int(os.getenv("SURF_AI_MAX_CONCURRENT_BRANCHES", 3))
+        # Branch engines share their parent's budget so limits apply per session.
+        self.budget = budget or self._new_budget()
+        self.loop_detector = LoopDetector()
+        self.max_loop_warnings = 1
+        self.loop_warnings = 0
+        self.supervisor_notes = "None"
+        self.json_task = None
+        self.previous_turns = []  # tasks of earlier turns of a kept-alive session
         self.final_answer = None  
+        self.step_count = 0
 
-    def go_surf(self, prompt: str): 
+    def go_surf(self, prompt: str, chat_history=None): 
         try:
-            self._initialize_task(prompt)
-            with self.browser_manager.create_browser() as browser:
-                context = self.browser_manager.create_context(browser) 
-                page = self.browser_manager.create_page(context)
-                self._process_tasks(prompt, page)
-                self.logger.debug("🟢 Final answer: %s", self.final_answer, extra={'no_memory': True})
+            self._start_turn()
+            self._initialize_task(prompt, chat_history)
+            self._checkpoint(prompt, status="planned")
+            if self.json_task.get('branches'):
+                self._run_branches(prompt)
+            else:
+                self._surf(prompt)
+            self.logger.debug("🟢 Final answer: %s", self.final_answer, extra={'no_memory': True})
             return self.final_answer
         except Exception as e:
             self.logger.exception(f"Critical error: {str(e)}")    
             raise
 
-    def _call_model_with_retry(self, messages, model, **kwargs): 
+    def resume(self):
+        """
+        Continues this session from its last checkpoint: the browser context is
+        rebuilt from the saved storage state and tabs, and the task that was
+        pending when the session stopped is re-validated against the restored
+        page instead of being blindly re-executed.
+        """
+        if self.checkpoint_store is None:
+            raise CheckpointNotFoundError("Checkpoints are disabled")
+        checkpoint = self.checkpoint_store.latest(self.session_id)
+        if checkpoint is None:
+            raise CheckpointNotFoundError(f"No checkpoint found for session '{self.session_id}'")
+        if checkpoint["status"] == "completed":
+            self.json_task = checkpoint.get("json_task")
+            self.final_answer = checkpoint.get("final_answer")
+            self.step_count = checkpoint.get("step") or 0
+            return self.final_answer
+        try:
+            prompt = checkpoint["prompt"]
+            self.json_task = checkpoint["json_task"]
+            self.json_task.pop("stopped_reason", None)  # a stopped session resumes with a fresh budget
+            self.step_count = checkpoint["step"]
+            self.execution_logs.extend(checkpoint.get("execution_logs", []))
+            self.logger.debug("🟡 Resuming session '%s' from step %d", self.session_id, self.step_count)
+            if self.json_task.get('branches'):
+                self._run_branches(prompt, resuming=True)
+            else:
+                self._surf(prompt, checkpoint)
+            self.logger.debug("🟢 Final answer: %s", self.final_answer, extra={'no_memory': True})
+            return self.final_answer
+        except Exception as e:
+            self.logger.exception(f"Critical error: {str(e)}")    
+            raise
+
+    def close(self):
+        try:
+            if self.context is not None:
+                self._browser(lambda worker: self._close_context())
+        finally:
+            LoggingConfigurator.release_logger(self.logger)
+
+    def _start_turn(self):
+        # Each message is a new turn: its own task list, step count, logs and
+        # budget. The tasks of earlier turns are summarized for the planner.
+        if self.keep_alive and self.json_task:
+            self.previous_turns = (self.previous_turns + [self.json_task])[-3:]
+        self.json_task = None
+        # The first step of the turn gets a full page snapshot: this turn's
+        # planner never saw the structure a delta would be relative to.
+        self.screenshot_manager.dom_diff.reset()
+        self.final_answer = None
+        self.step_count = 0
+        self.execution_logs.clear()
+        if not self.is_branch:
+            self.budget = self._new_budget()
+        self.loop_detector.reset()
+        self.loop_warnings = 0
+        self.supervisor_notes = "None"
+
+    @staticmethod
+    def _new_budget() -> SessionBudget:
+        return SessionBudget(
+            max_steps=int(os.getenv("SURF_AI_MAX_STEPS", 50)),
+            max_seconds=float(os.getenv("SURF_AI_MAX_SECONDS", 1800)),
+            max_tokens=int(os.getenv("SURF_AI_MAX_TOKENS", 1500000))
+        )
+
+    def _browser(self, fn, *args):
+        """Runs fn(worker, *args) on the thread of this session's browser worker."""
+        return self.browser_pool.run(fn, *args, worker=self.worker)
+
+    def _surf(self, prompt: str, checkpoint=None):
+        # The task loop runs on the caller's thread and only page operations
+        # are sent to the browser worker, so model calls and waits never hold
+        # the browser thread. A live context pins the session to its worker.
+        resumed = checkpoint is not None and checkpoint["step"] > 0
+        worker = self.browser_pool.acquire(self.worker if self.context is not None else None)
+        try:
+            self.worker = worker
+            page = self._browser(self._open_page, checkpoint)
+            self._process_tasks(prompt, page, resumed=resumed)
+        finally:
+            try:
+                self._browser(self._end_turn)
+            finally:
+                self.browser_pool.release(worker)
+
+    def _open_page(self, worker, checkpoint=None):
+        # The browser is already warm, so each session only pays for a fresh context.
+        if checkpoint is not None or not self._has_live_page(worker):
+            self._close_context()
+            storage_state = checkpoint.get("storage_state") if checkpoint else None
+            self.context = worker.browser_manager.create_context(worker.browser, storage_state=storage_state)
+            self.page = worker.browser_manager.create_page(self.context)
+            self.screenshot_manager.dom_diff.reset()
+            if checkpoint is not None and checkpoint["step"] > 0:
+                self._restore_tabs(worker, self.context, self.page, checkpoint)
+        return self.page
+
+    def _end_turn(self, worker):
+        if self.keep_alive:
+            self.memory_bytes = self._measure_memory()
+        else:
+            self._close_context()
+
+    def _has_live_page(self, worker) -> bool:
+        if self.context is None or self.context.browser is not worker.browser:
+            return False
+        if self.page is None or self.page.is_closed():
+            open_pages = [page for page in self.context.pages if not page.is_closed()]
+            if not open_pages:
+                return False
+            self.page = open_pages[0]
+        return True
+
+    def _close_context(self):
+        if self.context is not None:
+            try:
+                self.context.close()
+            except Exception as e:
+                self.logger.debug(f"Closing browser context failed: {str(e)}", extra={'no_memory': True})
+        self.context = None
+        self.page = None
+
+    def _measure_memory(self) -> int:
+        # JS heap of every page in the context; Chromium exposes it through performance.memory.
+        total = 0
+        for page in self.context.pages:
+            try:
+                total += page.evaluate("() => performance.memory ? performance.memory.usedJSHeapSize : 0") or 0
+            except Exception:
+                pass
+        return total
+
+    def _current_location(self):
+        if self.context is None:
+            return None
+        def read_location(worker):
+            if not self._has_live_page(worker):
+                return None
+            page = self.context.pages[-1]
+            return {"url": page.url, "title": page.title()}
+        try:
+            return self._browser(read_location)
+        except Exception:
+            return None
+
+    def _run_branches(self, prompt: str, resuming: bool = False):
+        """
+        Runs the independent branches planned for this objective at the same
+        time, each in its own browser context and with its own task state, then
+        merges their data_extraction results into the final answer. At most
+        max_concurrent_branches branches of this session run at once. Each
+        running branch claims its own browser worker, and the pool launches
+        more browsers when all of them are busy.
+        """
+        branches = self.json_task['branches']
+        names = set()
+        for index, branch in enumerate(branches, start=1):
+            # Branch names key the branch checkpoints, so they must be unique.
+            name = branch.get('branch_name') or f"branch_{index}"
+            if name in names:
+                name = f"{name}_{index}"
+            branch['branch_name'] = name
+            names.add(name)
+
+        pending = [branch for branch in branches if branch.get('status') != 'completed']
+        self.logger.debug("🟣 Running %d independent branches (%d already completed)", len(pending), len(branches) - len(pending))
+
+        if pending:
+            with ThreadPoolExecutor(
+                max_workers=max(1, min(self.max_concurrent_branches, len(pending))),
+                thread_name_prefix=f"surf-ai-branch-{self.session_id[:8]}"
+            ) as executor:
+                futures = {executor.submit(self._run_branch, branch, resuming): branch for branch in pending}
+                for future in as_completed(futures):
+                    branch = futures[future]
+                    branch['status'], result, steps_taken = future.result()
+                    # Drop the outcome of an earlier run that this one replaces.
+                    branch.pop('error', None)
+                    branch.pop('stopped_reason', None)
+                    branch.update(result)
+                    # The steps taken before a resume are already in step_count.
+                    self.step_count += steps_taken
+                    self._checkpoint(prompt)
+
+        # Decided from the branch outcomes: the budget may be spent exactly by
+        # the last step of a branch that still completed its objective.
+        stopped_reason = self._branches_stopped_reason(branches)
+        if stopped_reason:
+            self.json_task['stopped_reason'] = stopped_reason
+        self._generate_final_answer(prompt, self._merge_branches(branches), stopped_reason)
+        self._checkpoint(prompt, status="stopped" if stopped_reason else "completed")
+
+    def _run_branch(self, branch, resuming: bool):
+        """Returns the branch status, its result and the steps taken by this run."""
+        branch_engine = SurfAiEngine(
+            browser_pool=self.browser_pool,
+            session_id=f"{self.session_id}.{branch['branch_name']}",
+            checkpoint_store=self.checkpoint_store,
+            is_branch=True,
+            budget=self.budget
+        )
+        start_step = 0
+        try:
+            stopped_reason = self.budget.exceeded()
+            if stopped_reason:
+                return 'skipped', {"tasks": [], "steps": 0, "stopped_reason": stopped_reason}, 0
+            checkpoint = self.checkpoint_store.latest(branch_engine.session_id) if resuming and self.checkpoint_store else None
+            if checkpoint is not None and self.checkpoint_store.matches_prompt(checkpoint, branch['objective']):
+                start_step = checkpoint.get("step") or 0
+                branch_engine.resume()
+            else:
+                branch_engine.go_surf(branch['objective'])
+            result = {"tasks": branch_engine.json_task['tasks'], "steps": branch_engine.step_count}
+            if branch_engine.json_task.get('stopped_reason'):
+                # Not 'completed', so that resuming the session runs the branch again.
+                result["stopped_reason"] = branch_engine.json_task['stopped_reason']
+                return 'stopped', result, branch_engine.step_count - start_step
+            return 'completed', result, branch_engine.step_count - start_step
+        except Exception as e:
+            self.logger.debug(f"🔴 Branch '{branch['branch_name']}' failed: {str(e)}")
+            tasks = (branch_engine.json_task or {}).get('tasks', [])
+            return 'failed', {"tasks": tasks, "steps": branch_engine.step_count, "error": str(e)}, max(0, branch_engine.step_count - start_step)
+        finally:
+            branch_engine.close()
+
+    @staticmethod
+    def _branches_stopped_reason(branches):
+        reasons = []
+        for branch in branches:
+            if branch.get('status') == 'skipped':
+                reasons.append(f"branch '{branch['branch_name']}' was not started because {branch.get('stopped_reason')}")
+            elif branch.get('status') == 'failed':
+                reasons.append(f"branch '{branch['branch_name']}' failed ({branch.get('error')})")
+            elif branch.get('status') == 'stopped':
+                reasons.append(f"branch '{branch['branch_name']}' stopped because {branch['stopped_reason']}")
+        return "; ".join(reasons) or None
+
+    @staticmethod
+    def _merge_branches(branches):
+        merged = []
+        for branch in branches:
+            entry = {
+                "branch_name": branch['branch_name'],
+                "objective": branch.get('objective'),
+                "status": branch.get('status'),
+                "data_extraction": [task['data_extraction'] for task in branch.get('tasks', []) if task.get('data_extraction')]
+            }
+            if branch.get('error'):
+                entry["error"] = branch['error']
+            if branch.get('stopped_reason'):
+                entry["stopped_reason"] = branch['stopped_reason']
+            merged.append(entry)
+        return {"branches": merged}
+
+    def _restore_tabs(self, worker, context, page, checkpoint):
+        tabs = [url for url in checkpoint.get("tabs", []) if url and url != "about:blank"]
+        for index, url in enumerate(tabs):
+            tab = page if index == 0 else worker.browser_manager.create_page(context)
+            try:
+                tab.goto(url)
+            except Exception as e:
+                self.logger.debug(f"Restoring tab '{url}' failed: {str(e)}")
+        pending = self.json_task['tasks'][-1]
+        if pending.get('result_validation', 'waiting for result') == 'waiting for result':
+            pending['result_validation'] = (
+                "Unknown: the session was interrupted and restored from a checkpoint. "
+                "Verify on the current page whether this task took effect before continuing."
+            )
+
+    def _checkpoint(self, prompt: str, page=None, status: str = "running"):
+        if self.checkpoint_store is None:
+            return
+        record = {
+            "session_id": self.session_id,
+            "status": status,
+            "step": self.step_count,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "prompt": prompt,
+            "json_task": self.json_task,
+            "execution_logs": list(self.execution_logs),
+            "final_answer": self.final_answer,
+        }
+        try:
+            if page is not None:
+                record.update(self._browser(self._page_state, page))
+            self.checkpoint_store.append(self.session_id, record)
+        except Exception as e:
+            self.logger.warning(f"Checkpoint failed: {str(e)}", extra={'no_memory': True})
+
+    @staticmethod
+    def _page_state(worker, page):
+        pages = page.context.pages
+        return {
+            "url": pages[-1].url,
+            "tabs": [tab.url for tab in pages],
+            "storage_state": page.context.storage_state()
+        }
+
+    def _call_model_with_retry(self, messages, model, validate=None, **kwargs): 
         """
         Helper method that wraps the call_model function in a retry loop.
         It retries if the response is None, if it doesn't have the expected attribute,
-        or if the JSON cannot be parsed.
+        if the JSON cannot be parsed, or if validate(parsed) raises ValueError.
         """
         attempts = 0 
         while attempts <= self.max_retries: 
             try:
-                response = call_model(messages, model, **kwargs, output_format="json_object")
+                response = call_model(
+                    messages,
+                    model=model,
+                    output_format="json_object",
+                    on_usage=self.budget.record_usage,
+                    **kwargs
+                )
                 if response is None:
                     raise ValueError("Received None as response from call_model")
                 sanitized = JsonResponseHandler.sanitize_response(response)
-                json.loads(sanitized)
+                parsed = json.loads(sanitized)
+                if validate is not None:
+                    validate(parsed)
                 return response
             except (AttributeError, ValueError, json.JSONDecodeError) as e:
                 attempts += 1
@@ -65,11 +402,17 @@ class SurfAiEngine:
                     raise
                 time.sleep(self.retry_backoff / 1000.0)  
 
-    def _initialize_task(self, prompt: str):
-        json_task_prompt = GEN_JSON_TASK_PROMPT.substitute(user_message=prompt)
+    def _initialize_task(self, prompt: str, chat_history=None):
+        json_task_prompt = GEN_JSON_TASK_PROMPT.substitute(
+            user_message=prompt,
+            conversation_context=self._conversation_context(chat_history),
+            # A branch is already one independent sub-objective: never split it again.
+            branching_guidelines="" if self.is_branch else BRANCHING_GUIDELINES
+        )
         response = self._call_model_with_retry(
             [{"role": "user", "content": json_task_prompt}],
-            self.json_task_model
+            self.json_task_model,
+            validate=self._validate_plan
         )
         self.json_task = json.loads(JsonResponseHandler.sanitize_response(response))
         self.logger.debug( 
@@ -78,25 +421,138 @@ class SurfAiEngine:
             extra={'no_memory': True}   
         )
 
-    def _process_tasks(self, prompt: str, page):
+    @staticmethod
+    def _validate_plan(plan):
+        """Raises ValueError unless the plan has tasks to run or valid branches."""
+        if not isinstance(plan, dict):
+            raise ValueError("The plan is not a JSON object")
+        branches = plan.get('branches')
+        if branches:
+            if not isinstance(branches, list):
+                raise ValueError("'branches' is not a list")
+            for index, branch in enumerate(branches, start=1):
+                if not isinstance(branch, dict) or not isinstance(branch.get('objective'), str) or not branch['objective'].strip():
+                    raise ValueError(f"Branch {index} has no objective")
+            return
+        tasks = plan.get('tasks')
+        if not isinstance(tasks, list) or not tasks or not all(isinstance(task, dict) for task in tasks):
+            raise ValueError("The plan has neither tasks nor branches")
+
+    def _conversation_context(self, chat_history) -> str:
+        location = self._current_location() if self.keep_alive else None
+        if not chat_history and location is None and not self.previous_turns:
+            return ""
+        history = "\n".join(
+            f"{message.get('role', 'user')}: {str(message.get('content', ''))[:1000]}"
+            for message in (chat_history or [])[-10:]
+        )
+        return CONVERSATION_CONTEXT.substitute(
+            current_page=f"{location['url']} ({location['title']})" if location else "a blank page",
+            chat_history=history or "(none)",
+            previous_tasks=self._previous_tasks_summary() or "(none)"
+        )
+
+    def _previous_tasks_summary(self) -> str:
+        # Descriptions, outcomes and extracted data only: commands can carry
+        # credentials typed into forms and add nothing the planner needs.
+        lines = []
+        for json_task in self.previous_turns:
+            tasks = list(json_task.get('tasks', []))
+            for branch in json_task.get('branches', []):
+                tasks += [dict(task, task_name=f"{branch['branch_name']}.{task.get('task_name')}") for task in branch.get('tasks', [])]
+            for task in tasks[-15:]:
+                parts = [f"- {task.get('task_name')}: {task.get('description') or 'no description'}"]
+                if task.get('result_validation'):
+                    parts.append(f"Result: {str(task['result_validation'])[:300]}")
+                if task.get('data_extraction'):
+                    parts.append(f"Extracted data: {str(task['data_extraction'])[:1500]}")
+                lines.append(" | ".join(parts))
+        return "\n".join(lines)
+
+    def _process_tasks(self, prompt: str, page, resumed: bool = False):
         while True:
+            stopped_reason = self.budget.exceeded()
+            if stopped_reason:
+                self._stop_early(prompt, page, stopped_reason)
+                break
             task = self.json_task['tasks'][-1] 
-            self._execute_task_commands(task, page)
-            self._update_task_state(prompt, page, task)
+            self.step_count += 1
+            self.budget.record_step()
+            if resumed:
+                # The pending task may have run before the interruption: observe
+                # the restored page and re-plan instead of executing it again.
+                resumed = False
+            else:
+                self._browser(lambda worker: self._execute_task_commands(task, page))
+            stopped_reason = self._update_task_state(prompt, page, task)
+            if stopped_reason:
+                self._stop_early(prompt, page, stopped_reason)
+                break
+            self._checkpoint(prompt, page)
               
             if self.json_task.get('is_last_task'):
-                final_answer_prompt = FINAL_ANSWER_PROMPT.substitute( 
-                    json_task=json.dumps(self.json_task, indent=4),
-                    user_message=prompt
-                )
-                response = call_model(
-                    [{"role": "user", "content": final_answer_prompt}],
-                    self.json_task_model,
-                    output_format="text"
-                )
+                # Branch results are merged and summarized once by the parent session.
+                if not self.is_branch:
+                    self._generate_final_answer(prompt, self.json_task)
                 self.logger.debug("Final task completed")
-                self.final_answer = response  
+                self._checkpoint(prompt, page, status="completed")
                 break 
+
+    def _stop_early(self, prompt: str, page, stopped_reason: str):
+        self.logger.debug("🟠 Stopping early: %s", stopped_reason)
+        self.json_task['stopped_reason'] = stopped_reason
+        if not self.is_branch:
+            self._generate_final_answer(prompt, self.json_task, stopped_reason)
+        self._checkpoint(prompt, page, status="stopped")
+
+    def _generate_final_answer(self, prompt: str, json_task, stopped_reason: str = None):
+        if stopped_reason and self.budget.tokens_exhausted():
+            # No tokens left for a summary call: build the partial answer locally.
+            self.final_answer = self._partial_answer(json_task, stopped_reason)
+            return
+        if stopped_reason:
+            completion_status = f"Stopped before completing the objective because {stopped_reason}."
+        else:
+            completion_status = "Completed successfully."
+        final_answer_prompt = FINAL_ANSWER_PROMPT.substitute( 
+            json_task=json.dumps(json_task, indent=4),
+            user_message=prompt,
+            completion_status=completion_status
+        )
+        self.final_answer = call_model(
+            [{"role": "user", "content": final_answer_prompt}],
+            model=self.json_task_model,
+            output_format="text",
+            on_usage=self.budget.record_usage
+        )
+
+    @staticmethod
+    def _partial_answer(json_task, stopped_reason: str) -> str:
+        extracted = [task['data_extraction'] for task in json_task.get('tasks', []) if task.get('data_extraction')]
+        for branch in json_task.get('branches', []):
+            extracted += [f"{branch['branch_name']}: {value}" for value in branch.get('data_extraction', [])]
+        answer = f"The automated web navigation was stopped before completing the objective because {stopped_reason}."
+        if not extracted:
+            return answer + "\n\nNo data was extracted before stopping."
+        return answer + "\n\nPartial results:\n" + "\n".join(f"- {value}" for value in extracted)
+
+    def _check_for_loop(self, task):
+        """
+        Records the step in the loop detector. The first detection adds a
+        corrective hint to the next planning prompt; a loop detected again
+        after max_loop_warnings hints returns the reason to stop the session.
+        """
+        self.supervisor_notes = "None"
+        issue = self.loop_detector.record(task.get('commands'), self.screenshot_manager.dom_diff.fingerprint())
+        if issue is None:
+            return None
+        self.loop_warnings += 1
+        self.loop_detector.reset()
+        if self.loop_warnings > self.max_loop_warnings:
+            return f"the session was stuck in a loop ({issue})"
+        self.logger.debug("🟠 Loop detected: %s", issue)
+        self.supervisor_notes = LOOP_HINT.substitute(issue=issue)
+        return None
  
     def _execute_task_commands(self, task, page):    
         if task.get('data_extraction') and (task.get('commands') == 'data_extraction' or task.get('commands') is None):
@@ -109,21 +565,30 @@ class SurfAiEngine:
                 break     
  
     def _update_task_state(self, prompt: str, page, task): 
-        self.highlighter.remove_highlight(page)   
-        pages = page.context.pages
-        if len(pages) > 1:
-            page = pages[-1]  
+        page, switched = self._browser(self._observed_page, page)
+        if switched:
             time.sleep(3)
             self.logger.debug("🟡 Multiple pages detected; switching to the last opened page.")
-        self.highlighter.apply_highlight(page) 
+        time.sleep(2)  # let the page settle before numbering its elements
+        self._browser(lambda worker: self.highlighter.apply_highlight(page))
         time.sleep(1)
-        self.screenshot_manager.capture(page, task['task_name'])
+        wants_content = self._wants_page_content(task)
+        content = self._browser(self._capture, page, task, wants_content)
+        stopped_reason = self._check_for_loop(task)
+        if stopped_reason:
+            return stopped_reason
+        if wants_content:
+            page_content = self.content_extractor.select_relevant(content, prompt, on_usage=self.budget.record_usage)
+        else:
+            page_content = "NOT_REQUESTED"
  
         
         loop_prompt = GEN_JSON_TASK_LOOP_PROMPT.substitute( 
             json_task=json.dumps(self.json_task, indent=4), 
             execution_logs=self.execution_logs,
             scraped_page=self.screenshot_manager.scraped_page,
+            page_content=page_content,
+            supervisor_notes=self.supervisor_notes,
             user_message=prompt
         ) 
         
@@ -144,4 +609,24 @@ class SurfAiEngine:
             "🔵 Whole JSON tasks %s", 
             json.dumps(self.json_task, indent=4), 
             extra={'no_memory': True}
-        )  
+        )
+
+    def _observed_page(self, worker, page):
+        self.highlighter.remove_highlight(page)
+        pages = page.context.pages
+        if len(pages) > 1:
+            return pages[-1], True
+        return page, False
+
+    def _capture(self, worker, page, task, with_content: bool):
+        self.screenshot_manager.capture(page, task['task_name'])
+        return self.content_extractor.extract(page) if with_content else None
+
+    def _wants_page_content(self, task) -> bool:
+        # Reading and ranking the page text costs an embeddings call and prompt
+        # space, so it is only done when the objective asks for data.
+        return bool(
+            self.json_task.get('data_extraction_required')
+            or task.get('data_extraction')
+            or task.get('commands') == 'data_extraction'
+        )
@@ -1,6 +1,9 @@
+import itertools
 import logging
 from typing import List
 
+_logger_ids = itertools.count(1)
+
 class MemoryLogHandler(logging.Handler):
     def __init__(self, execution_logs: List[str], *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -15,8 +18,10 @@ class MemoryLogHandler(logging.Handler):
 class LoggingConfigurator:
     @staticmethod
     def configure_logger(execution_logs: List[str]) -> logging.Logger:
-        logging.basicConfig(level=logging.DEBUG)
-        logger = logging.getLogger(__name__)
+        # Each engine gets its own child logger so that engines running
+        # concurrently never write into each other's execution logs.
+        logger = logging.getLogger(f"{__name__}.engine-{next(_logger_ids)}")
+        logger.setLevel(logging.DEBUG)  # execution logs must not depend on the host's root level
         
         memory_handler = MemoryLogHandler(execution_logs) 
         memory_handler.setLevel(logging.DEBUG)
@@ -24,4 +29,11 @@ class LoggingConfigurator:
         memory_handler.setFormatter(formatter)
         
         logger.addHandler(memory_handler)
-        return logger
\ No newline at end of file
+        return logger
+
+    @staticmethod
+    def release_logger(logger: logging.Logger):
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+        logging.Logger.manager.loggerDict.pop(logger.name, None)
@@ -11,6 +11,7 @@ We do not write all the tasks in advance, but start only with the first one that
 You should output **only** valid JSON using the structure:
 
 {
+  "data_extraction_required": false,
   "tasks": [
     {
       "task_name": "name_of_the_task",
@@ -31,6 +32,8 @@ You should output **only** valid JSON using the structure:
                                   
 3. Create only the first task, the subsequent ones will be added after.
 
+4. Set **data_extraction_required** to true when the user asks to retrieve, read, compare or report information from the pages (prices, dates, descriptions, results...), and to false when the objective is only to perform actions (navigate, fill forms, click, purchase). When true, the readable text of each page will be provided in the next steps.
+
 **Critical Requirements**:
 - IMPORTANT: Ensure that each command attribute contains only one Playwright command, for example:
 {
@@ -48,7 +51,8 @@ You should output **only** valid JSON using the structure:
                                 
 **Critical Network Handling**: 
 - Never use networkidle
- 
+$branching_guidelines 
+
 Example VALID Command:
 {
   "task_name": "safe_search",
@@ -63,6 +67,7 @@ Go to Amazon, log in using my username: 'my_user_name' and my password: 'my_pass
 
 Output example:
 {
+  "data_extraction_required": false,
   "tasks": [
     {
       "task_name": "navigate_to_amazon",
@@ -72,6 +77,7 @@ Output example:
   ]
 }
 
+$conversation_context
 Now, please generate the JSON following the above format and guidelines, considering this user message:
 $user_message
                                 
@@ -88,6 +94,8 @@ You are an AI Web Automation controller that generates sequential Playwright com
 - Progress Snapshot: $json_task 
 - Execution Logs: $execution_logs 
 - Current Page Structure: $scraped_page 
+- Readable Page Content: $page_content 
+- Supervisor Notes: $supervisor_notes 
 
 **Operational Protocol**:  
                                       
@@ -116,12 +124,14 @@ You are an AI Web Automation controller that generates sequential Playwright com
    - Base element selection ONLY on current Progress Snapshot, use the image to help you understand the Current Page Structure
    - Scroll if needed before element interaction
    - Never repeat exact command from failed tasks  
+   - If the Supervisor Notes report that the session is stuck in a loop, the next task must follow them: do not repeat the looping commands or pages, change strategy, and if the objective cannot be reached set `"is_last_task": true` and report in data_extraction what was found so far.
                           
 3. **Element Numbering System**:
   - Compare the image with your visual capabilities and the Current Page Structure to identify the elements to interact with, using data-highlight-number css attribute.
-  - Each visible element on the web page is assigned a unique number, and the numbers are sequential from top to bottom. 
+  - Each visible element on the web page is assigned a unique number. Numbers are stable: an element keeps the same number across steps as long as the page is not navigated, and elements that appear later get new, higher numbers.
   - The numbers are displayed on labels positioned at the top-left corner of the element, and the element has borders highlighted with the same color as the label.
   - A mapping between these numbers and the elements attribute `data-highlight-number` is provided as Current Page Structure. 
+  - After a navigation the Current Page Structure is a full list of the visible elements. On the same page it is an update relative to the previous step: added and changed elements are listed with their full HTML, elements that are no longer visible are listed by number, and unchanged elements are listed as a one-line summary (number, tag, key attributes and text). Unchanged elements are still present and can be used with their number.
   - Use the attribute `data-highlight-number` to reference elements in your commands.
   - When generating tasks that interact with specific elements, reference them using their assigned numbers from the Current Page Structure. For example, to click on an element numbered `5`, use the selector associated with that number, for example page.click('//*[@data-highlight-number="5"]').
                                      
@@ -177,7 +187,9 @@ You are an AI Web Automation controller that generates sequential Playwright com
                                      
 6. **Special Instructions for Data Extraction (data_extraction)**:
 - When the user's objective involves extracting specific data from the page (e.g., flight details, prices, dates, URLs, etc.), **do not generate interactive extraction commands** such as `page.inner_text()` or `page.get_attribute()`.
-- Instead, directly populate the **data_extraction** field by parsing the HTML content available in the provided Execution Logs ($execution_logs) and the Current Page Structure ($scraped_page).
+- Instead, directly populate the **data_extraction** field by parsing the HTML content available in the provided Execution Logs and the Current Page Structure.
+- The Readable Page Content contains the main text and tables of the current page, already filtered to the chunks most relevant to the Objective. Prefer it as the source for data_extraction: if the requested data is there, extract it immediately instead of scrolling or retrying.
+- The Readable Page Content is NOT_REQUESTED when the objective was planned as actions only. If the objective does require data from the pages, add `"data_extraction_required": true` to your output and the content will be provided from the next step.
 - For example, if the user asks:  
   "Go to wikipedia, search information about the moon landing. Get the information about it",  
   once information is visible, generate a task that directly extracts these details from the HTML and populates the **data_extraction**.
@@ -245,16 +257,57 @@ Only after these validations should the date be selected.
 """)
 
 
+LOOP_HINT = Template("""LOOP DETECTED: $issue. Repeating it will not make progress. \
+Do not reuse the same commands on this page: pick a different element, scroll to reveal other content, go back with page.go_back() or navigate elsewhere. \
+If the objective cannot be achieved, set "is_last_task": true and report the partial results in data_extraction. \
+The session will be stopped if the loop continues.""")
+
+
+CONVERSATION_CONTEXT = Template("""
+**Conversation Context**:
+This message is a follow-up in an ongoing chat. The browser is still open from the previous messages and currently shows: $current_page
+
+Previous conversation:
+$chat_history
+
+Tasks already executed for the previous messages, with their results and the data extracted:
+$previous_tasks
+
+- Resolve references such as "the second result" or "that page" using the previous conversation, the previous tasks and the current page.
+- Reuse data already extracted by the previous tasks instead of collecting it again.
+- Continue from the current page whenever possible instead of navigating again from scratch.
+- If you need to look at the current page before acting, create a first task with "commands": null; the page structure will be provided in the next step.
+""")
+
+
+BRANCHING_GUIDELINES = """
+**Independent Branches**:
+- If the objective is made of independent sub-objectives that do not depend on each other's results (for example comparing the price of the same product on several different websites), do not create tasks. Instead output one branch per sub-objective; the branches will be executed in parallel, each in its own browser.
+- Each branch objective must be self-contained: include every detail of the user message it needs (product, site, credentials, constraints), because it will not see the other branches.
+- Never split steps that must happen in sequence (log in then search, search then open a result) into separate branches.
+- Use this structure instead of "tasks":
+{
+  "branches": [
+    {
+      "branch_name": "bestbuy_price",
+      "objective": "Go to https://www.bestbuy.com/ and find the price of the top 3 search results for iPhone 13 Pro"
+    }
+  ]
+}
+"""
+
+
 FINAL_ANSWER_PROMPT = Template("""
 You are tasked to generate the final answer message for the user.
 
 **Context**:
 - Objective: $user_message
 - Progress Snapshot: $json_task
+- Completion Status: $completion_status
 
-Using all of the above information—and especially taking into account the user's objective as well as all the data_extraction values accumulated across the tasks—produce a single, clear, and concise plain text message that:
+Using all of the above information—and especially taking into account the user's objective as well as all the data_extraction values accumulated across the tasks (or across the branches, when the objective was split into independent branches)—produce a single, clear, and concise plain text message that:
 1. Summarizes the data_extraction values from the tasks. If there are no data_extraction values, add the next point 2.
-2. Clearly confirms that the automated web navigation has been completed successfully.
+2. Clearly reports the Completion Status: confirm that the automated web navigation has been completed successfully or, if it was stopped early, say so, explain why in one sentence and present the partial results.
 
-Your final answer must be a straightforward message that directly addresses the user's initial request and informs them of the successful completion of the automation process.
+Your final answer must be a straightforward message that directly addresses the user's initial request and informs them of the outcome of the automation process.
 """)
\ No newline at end of file
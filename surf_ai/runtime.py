@@ -0,0 +1,136 @@
+import logging
+import os
+import threading
+import time
+from models.models import get_client
+from .browser_pool import BrowserPool
+from .checkpoint_store import CheckpointStore
+
+logger = logging.getLogger(__name__)
+
+_browser_pool = None
+_session_registry = None
+_pool_lock = threading.Lock()
+_model_client_ready = threading.Event()
+_model_warm_up_started = False
+_model_client_error = None
+_started_at = time.monotonic()
+_ready_at = None
+_CHECKPOINT_SWEEP_SECONDS = 3600
+
+
+def _reset_after_fork():
+    # Worker threads and browsers do not survive fork(): a process forked after
+    # warm-up (gunicorn --preload) would inherit a pool whose workers never
+    # run. The child drops the inherited state and warms up its own.
+    global _browser_pool, _session_registry, _pool_lock, _model_client_ready
+    global _model_warm_up_started, _model_client_error, _started_at, _ready_at
+    warmed_up = _model_warm_up_started
+    _browser_pool = None
+    _session_registry = None
+    _pool_lock = threading.Lock()
+    _model_client_ready = threading.Event()
+    _model_warm_up_started = False
+    _model_client_error = None
+    _started_at = time.monotonic()
+    _ready_at = None
+    if warmed_up:
+        warm_up()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_browser_pool() -> BrowserPool:
+    """Returns the process-wide browser pool, starting its workers on first use."""
+    global _browser_pool
+    if _browser_pool is None:
+        with _pool_lock:
+            if _browser_pool is None:
+                _browser_pool = BrowserPool(
+                    size=int(os.getenv("SURF_AI_BROWSER_POOL_SIZE", 1)),
+                    max_size=int(os.getenv("SURF_AI_BROWSER_POOL_MAX_SIZE", 8)),
+                    command_timeout=10000
+                ).start()
+    return _browser_pool
+
+
+def get_session_registry():
+    """Returns the process-wide registry of live chat sessions."""
+    global _session_registry
+    if _session_registry is None:
+        # Imported here: the registry depends on the engine, which depends on this module.
+        from .session_registry import SessionRegistry
+        browser_pool = get_browser_pool()
+        with _pool_lock:
+            if _session_registry is None:
+                _session_registry = SessionRegistry(
+                    browser_pool=browser_pool,
+                    ttl_seconds=float(os.getenv("SURF_AI_SESSION_TTL_SECONDS", 900)),
+                    max_sessions=int(os.getenv("SURF_AI_MAX_SESSIONS", 8)),
+                    memory_cap_mb=float(os.getenv("SURF_AI_SESSIONS_MEMORY_CAP_MB", 2048))
+                )
+    return _session_registry
+
+
+def warm_up():
+    """
+    Pre-warms the browser pool and the model client in the background so the
+    first request does not pay for Playwright startup, browser launch or the
+    openai import, and starts the sweep of expired checkpoint files. Returns
+    immediately; poll readiness() to know when it's done. Safe to call more
+    than once: later calls are no-ops.
+    """
+    global _model_warm_up_started
+    get_browser_pool()
+    with _pool_lock:
+        if _model_warm_up_started:
+            return
+        _model_warm_up_started = True
+    threading.Thread(target=_warm_model_client, name="surf-ai-model-warmup", daemon=True).start()
+    if os.getenv("SURF_AI_CHECKPOINTS", "1") != "0":
+        threading.Thread(target=_sweep_checkpoints, name="surf-ai-checkpoint-sweeper", daemon=True).start()
+
+
+def _warm_model_client():
+    global _model_client_error
+    try:
+        get_client()
+    except Exception as e:
+        _model_client_error = e
+        logger.error("Model client warm-up failed: %s", str(e))
+    finally:
+        _model_client_ready.set()
+
+
+def _sweep_checkpoints():
+    store = CheckpointStore()
+    while True:
+        try:
+            removed = store.purge_expired()
+            if removed:
+                logger.info("Deleted %d expired checkpoint files", removed)
+        except OSError as e:
+            logger.error("Checkpoint sweep failed: %s", str(e))
+        time.sleep(_CHECKPOINT_SWEEP_SECONDS)
+
+
+def readiness() -> dict:
+    global _ready_at
+    # Under a server that imports the app without running warm_up() (flask
+    # run, gunicorn), the first probe starts it instead of failing forever.
+    warm_up()
+    browser_ready = _browser_pool is not None and _browser_pool.is_ready()
+    model_ready = _model_client_ready.is_set() and _model_client_error is None
+    ready = browser_ready and model_ready
+    if ready and _ready_at is None:
+        _ready_at = time.monotonic()
+    status = {
+        "ready": ready,
+        "browser_pool": browser_ready,
+        "model_client": model_ready,
+    }
+    if _ready_at is not None:
+        status["warm_up_seconds"] = round(_ready_at - _started_at, 3)
+    return status
@@ -1,5 +1,6 @@
 import base64
 from datetime import datetime
+from .dom_diff import DomDiff
 
 class ScreenshotManager:
     def __init__(self, truncation_length: int):
@@ -7,6 +8,7 @@ class ScreenshotManager:
         self.screenshot_url = None
         self.screenshot_base64 = None
         self.scraped_page = None
+        self.dom_diff = DomDiff()
 
     def capture(self, page, task_name):
         self._take_screenshot(page, task_name)
@@ -15,19 +17,32 @@ class ScreenshotManager:
     def _take_screenshot(self, page, task_name):
         current_time = datetime.now().strftime("%H-%M-%S")
         screenshot_path = f"./surf_ai/screenshots/{current_time}_{task_name}.png"
-        page.screenshot(path=screenshot_path, full_page=False)
+        # Use the returned bytes instead of re-reading the file: concurrent
+        # sessions can share a task name and overwrite each other's file.
+        screenshot = page.screenshot(path=screenshot_path, full_page=False)
         self.screenshot_url = screenshot_path
-        
-        with open(screenshot_path, "rb") as image_file:
-            self.screenshot_base64 = base64.b64encode(image_file.read()).decode('utf-8')
+        self.screenshot_base64 = base64.b64encode(screenshot).decode('utf-8')
 
     def _scrape_content(self, page):
         try:
-            elements_html = page.evaluate('''() => {
-                return Array.from(document.querySelectorAll('*[data-highlight-number]'));
+            snapshot = page.evaluate('''() => {
+                const state = window.__surfAiHighlight;
+                const clean = text => (text || '').replace(/\\s+/g, ' ').trim();
+                const elements = Array.from(document.querySelectorAll('.surf-ai-highlight-overlay')).map(overlay => {
+                    const number = parseInt(overlay.dataset.overlayNumber, 10);
+                    const el = document.querySelector(`[data-highlight-number="${number}"]`);
+                    if (!el) return null;
+                    const label = clean(el.innerText || el.value || el.getAttribute('aria-label') || el.getAttribute('placeholder') || el.getAttribute('title')).slice(0, 60);
+                    const attrs = ['type', 'name', 'role', 'href'].filter(a => el.hasAttribute(a)).map(a => `${a}="${el.getAttribute(a).slice(0, 60)}"`).join(' ');
+                    return {
+                        number,
+                        html: el.outerHTML.slice(0, 2000),
+                        summary: `<${el.tagName.toLowerCase()}${attrs ? ' ' + attrs : ''}> ${label}`.trim()
+                    };
+                }).filter(Boolean);
+                return {documentId: state ? state.documentId : null, url: location.href, elements};
             }''')
-            
-            scraped_content = f"<!-- Visible Interactive Elements ({len(elements_html)}) -->\n" + '\n'.join(elements_html)
-            self.scraped_page = scraped_content[:self.truncation_length]
+            self.scraped_page = self.dom_diff.render(snapshot)[:self.truncation_length]
         except Exception as e:
-            self.scraped_page = "CONTENT_UNAVAILABLE"
\ No newline at end of file
+            self.dom_diff.reset()
+            self.scraped_page = "CONTENT_UNAVAILABLE"
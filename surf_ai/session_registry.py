@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from .engine import SurfAiEngine
+
+logger = logging.getLogger(__name__)
+
+
+class Session:
+    def __init__(self, engine: SurfAiEngine):
+        self.engine = engine
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.active_turns = 0  # turns claimed or running; guarded by the registry lock
+
+    @property
+    def busy(self) -> bool:
+        return self.active_turns > 0
+
+
+class SessionRegistry:
+    """
+    Keeps one live engine (browser context, page and task state) per chat
+    session so that follow-up messages continue from the page left by the
+    previous turn. Idle sessions are evicted when they exceed the TTL, and the
+    least recently used idle sessions are evicted when the registry exceeds
+    max_sessions or the global memory cap. A session's memory is the JS heap
+    of its pages plus a fixed per-context baseline for the renderer.
+    """
+
+    def __init__(self, browser_pool, ttl_seconds: float = 900, max_sessions: int = 8,
+                 memory_cap_mb: float = 2048, context_baseline_mb: float = 50, sweep_interval: float = 60):
+        self.browser_pool = browser_pool
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.memory_cap_bytes = memory_cap_mb * 1024 * 1024
+        self.context_baseline_bytes = context_baseline_mb * 1024 * 1024
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._sweeper = threading.Thread(target=self._sweep, args=(sweep_interval,), name="surf-ai-session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def run_turn(self, session_id: str, prompt: str, chat_history=None) -> str:
+        session = self._get_or_create(session_id)
+        with session.lock:
+            try:
+                return session.engine.go_surf(prompt, chat_history)
+            finally:
+                self._touch(session_id, session)
+                self.evict()
+
+    def resume(self, session_id: str) -> str:
+        """Drops any live state of the session and continues it from its last checkpoint."""
+        self.discard(session_id)
+        session = self._get_or_create(session_id)
+        with session.lock:
+            try:
+                return session.engine.resume()
+            finally:
+                self._touch(session_id, session)
+                self.evict()
+
+    def discard(self, session_id: str):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            with session.lock:  # wait for a running turn to finish
+                self._close(session_id, session)
+
+    def evict(self):
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            for session_id, session in list(self._sessions.items()):
+                if not session.busy and now - session.last_used > self.ttl_seconds:
+                    evicted.append((session_id, self._sessions.pop(session_id), "idle TTL"))
+
+            # OrderedDict order is least recently used first.
+            while self._over_limits():
+                candidate = next(((sid, s) for sid, s in self._sessions.items() if not s.busy), None)
+                if candidate is None:
+                    break
+                session_id, session = candidate
+                evicted.append((session_id, self._sessions.pop(session_id), "LRU"))
+
+        for session_id, session, reason in evicted:
+            logger.debug("Evicting session '%s' (%s)", session_id, reason)
+            self._close(session_id, session)
+
+    def close(self):
+        self._stopped.set()
+        with self._lock:
+            sessions = list(self._sessions.items())
+            self._sessions.clear()
+        for session_id, session in sessions:
+            self._close(session_id, session)
+
+    def _get_or_create(self, session_id: str) -> Session:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                engine = SurfAiEngine(browser_pool=self.browser_pool, session_id=session_id, keep_alive=True)
+                session = self._sessions[session_id] = Session(engine)
+            session.active_turns += 1
+            session.last_used = time.monotonic()
+            self._sessions.move_to_end(session_id)
+        # Make room before the new turn opens another browser context.
+        self.evict()
+        return session
+
+    def _touch(self, session_id: str, session: Session):
+        with self._lock:
+            session.active_turns -= 1
+            session.last_used = time.monotonic()
+            if session_id in self._sessions:
+                self._sessions.move_to_end(session_id)
+
+    def _over_limits(self) -> bool:
+        if len(self._sessions) > self.max_sessions:
+            return True
+        return sum(self._memory(session) for session in self._sessions.values()) > self.memory_cap_bytes
+
+    def _memory(self, session: Session) -> float:
+        if session.engine.context is None:
+            return 0
+        return session.engine.memory_bytes + self.context_baseline_bytes
+
+    def _close(self, session_id: str, session: Session):
+        try:
+            session.engine.close()
+        except Exception as e:
+            logger.debug(f"Closing session '{session_id}' failed: {str(e)}")
+
+    def _sweep(self, interval: float):
+        while not self._stopped.wait(interval):
+            try:
+                self.evict()
+            except Exception as e:
+                logger.debug(f"Session sweep failed: {str(e)}")
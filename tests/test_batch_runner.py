@@ -0,0 +1,111 @@
+import io
+import json
+import pytest
+
+pytest.importorskip("playwright")
+
+from surf_ai import batch_runner
+from surf_ai.batch_runner import load_completed_ids, open_results, read_jobs
+from surf_ai.checkpoint_store import CheckpointStore
+
+
+class FakePool:
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_read_jobs_accepts_objects_and_bare_strings():
+    stream = io.StringIO(
+        '{"id": "a", "objective": "find flights"}\n'
+        '\n'
+        '{"prompt": "check the weather"}\n'
+        '"compare prices"\n'
+        '{"id": 7, "objective": "book a table"}\n'
+    )
+    assert list(read_jobs(stream)) == [
+        {"id": "a", "objective": "find flights"},
+        {"id": "line-3", "objective": "check the weather"},
+        {"id": "line-4", "objective": "compare prices"},
+        {"id": "7", "objective": "book a table"},
+    ]
+
+
+def test_read_jobs_turns_bad_lines_into_errors_and_keeps_going():
+    stream = io.StringIO(
+        '"ok"\n'
+        '{"id": "x"}\n'
+        '{not json\n'
+        '[1, 2]\n'
+        '"still read"\n'
+    )
+    jobs = list(read_jobs(stream))
+    assert [job["id"] for job in jobs] == ["line-1", "x", "line-3", "line-4", "line-5"]
+    assert "error" not in jobs[0] and "error" not in jobs[4]
+    assert "Missing 'objective' on line 2" in jobs[1]["error"]
+    assert "Invalid JSON on line 3" in jobs[2]["error"]
+    assert "line 4" in jobs[3]["error"]
+
+
+def test_read_jobs_rejects_duplicate_ids():
+    stream = io.StringIO(
+        '{"id": "a", "objective": "first"}\n'
+        '{"id": "a", "objective": "second"}\n'
+    )
+    first, duplicate = read_jobs(stream)
+    assert first == {"id": "a", "objective": "first"}
+    assert duplicate["error"] == "Duplicate id 'a' on line 2 (first used on line 1)"
+    assert "objective" not in duplicate
+
+
+def test_run_writes_a_failed_record_for_a_bad_line_and_runs_the_rest(monkeypatch):
+    monkeypatch.setattr(batch_runner, "get_client", lambda: None)
+    runner = batch_runner.BatchRunner(concurrency=2, browser_pool=FakePool())
+    monkeypatch.setattr(runner, "_run_job", lambda job: {"id": job["id"], "status": "completed", "result": job["objective"]})
+    output = io.StringIO()
+    stream = io.StringIO('"one"\n{broken\n{"id": "line-1", "objective": "dup"}\n"four"\n')
+
+    summary = runner.run(read_jobs(stream), output)
+
+    records = {(record["id"], record["status"]) for record in map(json.loads, output.getvalue().splitlines())}
+    assert summary == {"completed": 2, "failed": 2, "skipped": 0}
+    assert records == {("line-1", "completed"), ("line-2", "failed"), ("line-1", "failed"), ("line-4", "completed")}
+
+
+def test_resumed_completed_job_reports_its_steps(monkeypatch, tmp_path):
+    monkeypatch.setenv("SURF_AI_CHECKPOINT_DIR", str(tmp_path))
+    CheckpointStore().append("batch-a", {
+        "session_id": "batch-a",
+        "status": "completed",
+        "step": 7,
+        "prompt": "find flights",
+        "json_task": {"tasks": []},
+        "final_answer": "done",
+    })
+    runner = batch_runner.BatchRunner(browser_pool=FakePool(), resume_checkpoints=True)
+
+    record = runner._run_job({"id": "a", "objective": "find flights"})
+
+    assert (record["status"], record["resumed"], record["result"], record["steps"]) == ("completed", True, "done", 7)
+
+
+def test_load_completed_ids_skips_failures_and_truncated_lines(tmp_path):
+    results = tmp_path / "results.jsonl"
+    results.write_text(
+        '{"id": "a", "status": "completed"}\n'
+        '{"id": "b", "status": "failed"}\n'
+        '{"id": "c", "status": "compl',
+        encoding="utf-8"
+    )
+    assert load_completed_ids(str(results)) == {"a"}
+    assert load_completed_ids(str(tmp_path / "missing.jsonl")) == set()
+
+
+def test_open_results_appends_after_a_truncated_line_on_a_new_line(tmp_path):
+    results = tmp_path / "results.jsonl"
+    results.write_text('{"id": "a", "status": "completed"}\n{"id": "b", "sta', encoding="utf-8")
+    with open_results(str(results), append=True) as output:
+        output.write('{"id": "c", "status": "completed"}\n')
+    assert load_completed_ids(str(results)) == {"a", "c"}
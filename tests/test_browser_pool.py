@@ -0,0 +1,65 @@
+import threading
+import pytest
+
+pytest.importorskip("playwright")
+
+from surf_ai import browser_pool
+
+
+class FakeBrowser:
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+
+class FakeBrowserManager:
+    def __init__(self, command_timeout):
+        pass
+
+    def create_browser(self):
+        return FakeBrowser()
+
+    def stop(self):
+        pass
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(browser_pool, "BrowserManager", FakeBrowserManager)
+    pool = browser_pool.BrowserPool(size=1, max_size=3)
+    yield pool
+    pool.close()
+
+
+def test_acquire_launches_a_worker_per_running_turn(pool):
+    workers = [pool.acquire() for _ in range(3)]
+    assert len({worker.name for worker in workers}) == 3
+    assert len(pool.workers) == 3
+
+
+def test_acquire_shares_workers_once_the_pool_is_full(pool):
+    for _ in range(4):
+        pool.acquire()
+    assert len(pool.workers) == 3
+    assert sorted(worker.active for worker in pool.workers) == [1, 1, 2]
+
+
+def test_released_worker_is_reused_before_launching_another(pool):
+    worker = pool.acquire()
+    pool.release(worker)
+    assert pool.acquire() is worker
+    assert len(pool.workers) == 1
+
+
+def test_acquire_keeps_a_pinned_worker(pool):
+    worker = pool.acquire()
+    assert pool.acquire(worker) is worker
+    assert worker.active == 2
+
+
+def test_jobs_run_on_the_worker_thread(pool):
+    worker = pool.acquire()
+    thread_name = pool.run(lambda w: threading.current_thread().name, worker=worker)
+    assert thread_name == worker.name
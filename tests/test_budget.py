@@ -0,0 +1,77 @@
+from surf_ai.budget import LoopDetector, SessionBudget
+
+
+def test_budget_stops_at_the_step_limit():
+    budget = SessionBudget(max_steps=2, max_seconds=0, max_tokens=0)
+    budget.record_step()
+    assert budget.exceeded() is None
+    budget.record_step()
+    assert "step budget of 2" in budget.exceeded()
+
+
+def test_budget_stops_at_the_token_limit():
+    budget = SessionBudget(max_steps=0, max_seconds=0, max_tokens=100)
+    budget.record_usage({"total_tokens": 60})
+    assert not budget.tokens_exhausted()
+    budget.record_usage({"total_tokens": 40})
+    assert budget.tokens_exhausted()
+    assert "token budget of 100" in budget.exceeded()
+
+
+def test_budget_stops_at_the_time_limit():
+    budget = SessionBudget(max_steps=0, max_seconds=10, max_tokens=0)
+    budget.started -= 11
+    assert "time budget of 10" in budget.exceeded()
+
+
+def test_zero_disables_every_limit():
+    budget = SessionBudget(max_steps=0, max_seconds=0, max_tokens=0)
+    budget.started -= 10 ** 6
+    for _ in range(1000):
+        budget.record_step()
+    budget.record_usage({"total_tokens": 10 ** 9})
+    assert budget.exceeded() is None
+    assert not budget.tokens_exhausted()
+
+
+def test_loop_detector_flags_the_same_step_repeated():
+    detector = LoopDetector(window=8, max_repeats=3)
+    assert detector.record("page.click('#next')", "page-a") is None
+    assert detector.record("page.click('#other')", "page-b") is None
+    assert detector.record("page.click('#next')", "page-a") is None
+    assert "executed 3 times" in detector.record("page.click('#next')", "page-a")
+
+
+def test_loop_detector_ignores_whitespace_in_commands():
+    detector = LoopDetector(window=8, max_repeats=2)
+    detector.record("page.click('#next');  page.wait_for_timeout(100)", "page-a")
+    assert detector.record("page.click('#next'); page.wait_for_timeout(100)", "page-a") is not None
+
+
+def test_same_command_on_a_changing_page_is_not_a_loop():
+    detector = LoopDetector(window=8, max_repeats=3)
+    for page in range(6):
+        assert detector.record("page.mouse.wheel(0, 500)", f"page-{page}") is None
+
+
+def test_loop_detector_flags_a_two_step_cycle():
+    detector = LoopDetector(window=8, max_repeats=5)
+    steps = [("page.go_back()", "list"), ("page.click('#item')", "detail")] * 2
+    results = [detector.record(commands, page) for commands, page in steps]
+    assert results[:3] == [None, None, None]
+    assert "cycling between the same 2" in results[3]
+
+
+def test_loop_detector_flags_a_three_step_cycle():
+    detector = LoopDetector(window=8, max_repeats=5)
+    steps = [("a", "1"), ("b", "2"), ("c", "3")] * 2
+    results = [detector.record(commands, page) for commands, page in steps]
+    assert results[:5] == [None] * 5
+    assert "cycling between the same 3" in results[5]
+
+
+def test_loop_detector_forgets_after_reset():
+    detector = LoopDetector(window=8, max_repeats=2)
+    detector.record("a", "1")
+    detector.reset()
+    assert detector.record("a", "1") is None
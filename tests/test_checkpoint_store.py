@@ -0,0 +1,132 @@
+import json
+import os
+import time
+import pytest
+from surf_ai.checkpoint_store import CheckpointStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CheckpointStore(str(tmp_path))
+
+
+def record(step, tasks, status="running", **extra):
+    return dict({
+        "session_id": "s1",
+        "status": status,
+        "step": step,
+        "prompt": "log in with password hunter2",
+        "json_task": {"tasks": tasks},
+    }, **extra)
+
+
+def lines(store):
+    with open(store.path("s1"), encoding="utf-8") as checkpoints:
+        return [json.loads(line) for line in checkpoints]
+
+
+def test_latest_returns_none_without_checkpoints(store):
+    assert store.latest("missing") is None
+
+
+def test_storage_state_is_only_written_when_it_changes(store):
+    store.append("s1", record(1, [], storage_state={"cookies": ["a"]}))
+    store.append("s1", record(2, [], storage_state={"cookies": ["a"]}))
+    store.append("s1", record(3, [], storage_state={"cookies": ["b"]}))
+    store.append("s1", record(4, []))
+    assert ["storage_state" in line for line in lines(store)] == [True, False, True, False]
+    assert store.latest("s1")["storage_state"] == {"cookies": ["b"]}
+
+
+def test_records_only_carry_changed_tasks_and_new_logs(store):
+    tasks = [{"task_name": "open", "result_validation": "waiting for result"}]
+    store.append("s1", record(1, [dict(task) for task in tasks], execution_logs=["one"]))
+    tasks[0]["result_validation"] = "done"
+    tasks.append({"task_name": "search", "result_validation": "waiting for result"})
+    store.append("s1", record(2, [dict(task) for task in tasks], execution_logs=["one", "two"]))
+    tasks.append({"task_name": "read", "result_validation": "waiting for result"})
+    store.append("s1", record(3, [dict(task) for task in tasks], execution_logs=["one", "two", "three"]))
+
+    written = lines(store)
+    assert [(line["tasks_from"], len(line["tasks"])) for line in written] == [(0, 1), (0, 2), (2, 1)]
+    assert [line["execution_logs"] for line in written] == [["one"], ["two"], ["three"]]
+
+    latest = store.latest("s1")
+    assert latest["step"] == 3
+    assert latest["json_task"]["tasks"] == tasks
+    assert latest["execution_logs"] == ["one", "two", "three"]
+
+
+def test_latest_skips_a_truncated_line(store):
+    store.append("s1", record(1, [{"task_name": "open"}], storage_state={"cookies": ["a"]}))
+    with open(store.path("s1"), "a", encoding="utf-8") as checkpoints:
+        checkpoints.write('{"session_id": "s1", "step": 2, "tas')
+    latest = store.latest("s1")
+    assert latest["step"] == 1
+    assert latest["storage_state"] == {"cookies": ["a"]}
+
+
+def test_append_after_a_truncated_line_starts_a_new_line(store):
+    store.append("s1", record(1, [{"task_name": "open"}]))
+    with open(store.path("s1"), "a", encoding="utf-8") as checkpoints:
+        checkpoints.write('{"session_id": "s1", "step": 2, "tas')
+    CheckpointStore(store.directory).append("s1", record(3, [{"task_name": "open"}, {"task_name": "search"}]))
+    latest = store.latest("s1")
+    assert latest["step"] == 3
+    assert [task["task_name"] for task in latest["json_task"]["tasks"]] == ["open", "search"]
+
+
+def test_completed_session_is_compacted_without_credentials(store):
+    tasks = [{"task_name": "login", "commands": "page.fill('#password', 'hunter2')"}]
+    store.append("s1", record(1, tasks, execution_logs=["typed hunter2"], storage_state={"cookies": ["session"]}))
+    tasks.append({"task_name": "read", "commands": "data_extraction", "data_extraction": "balance: 10"})
+    store.append("s1", record(2, tasks, status="completed", final_answer="Your balance is 10"))
+
+    written = lines(store)
+    assert len(written) == 1
+    assert "hunter2" not in json.dumps(written)
+    assert "storage_state" not in written[0]
+
+    latest = store.latest("s1")
+    assert latest["final_answer"] == "Your balance is 10"
+    assert latest["json_task"]["tasks"][-1] == {"task_name": "read", "data_extraction": "balance: 10"}
+    assert CheckpointStore.matches_prompt(latest, "log in with password hunter2")
+    assert not CheckpointStore.matches_prompt(latest, "another objective")
+
+
+def age(path, seconds):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_purge_expires_completed_and_idle_unfinished_files(tmp_path):
+    store = CheckpointStore(str(tmp_path), ttl_seconds=3600, completed_ttl_seconds=60)
+    for session_id in ("done", "old_done", "idle", "recent"):
+        store.append(session_id, dict(record(1, []), session_id=session_id))
+    for session_id in ("done", "old_done"):
+        store.append(session_id, dict(record(2, [], status="completed"), session_id=session_id))
+    age(store.path("old_done"), 120)
+    age(store.path("idle"), 7200)
+    age(store.path("recent"), 120)
+
+    assert store.purge_expired() == 2
+    assert sorted(os.listdir(tmp_path)) == ["done.jsonl", "recent.jsonl"]
+
+
+def test_purge_keeps_everything_with_a_zero_ttl(tmp_path):
+    store = CheckpointStore(str(tmp_path), ttl_seconds=0, completed_ttl_seconds=0)
+    store.append("s1", record(1, []))
+    age(store.path("s1"), 10 ** 7)
+    assert store.purge_expired() == 0
+    assert store.latest("s1") is not None
+
+
+def test_append_after_purge_writes_a_full_record(tmp_path):
+    store = CheckpointStore(str(tmp_path), ttl_seconds=1)
+    store.append("s1", record(1, [{"task_name": "open"}], storage_state={"cookies": ["a"]}))
+    age(store.path("s1"), 60)
+    store.purge_expired()
+    store.append("s1", record(2, [{"task_name": "open"}], storage_state={"cookies": ["a"]}))
+    latest = store.latest("s1")
+    assert latest["json_task"]["tasks"] == [{"task_name": "open"}]
+    assert latest["storage_state"] == {"cookies": ["a"]}
@@ -0,0 +1,90 @@
+import logging
+import pytest
+from array import array
+from surf_ai.content_extractor import ContentExtractor, EmbeddingCache
+
+
+@pytest.fixture
+def extractor(monkeypatch):
+    monkeypatch.setenv("SURF_AI_CONTENT_EMBEDDINGS", "0")
+    return ContentExtractor(logging.getLogger(__name__), top_k=2, chunk_size=100)
+
+
+def test_headings_start_new_chunks_and_prefix_them(extractor):
+    chunks = extractor._chunk({"blocks": [
+        {"type": "heading", "text": "Prices"},
+        {"type": "text", "text": "The basic plan costs 10 euros."},
+        {"type": "heading", "text": "Support"},
+        {"type": "text", "text": "Email us any time."},
+    ]})
+    assert chunks == ["# Prices\nThe basic plan costs 10 euros.", "# Support\nEmail us any time."]
+
+
+def test_long_text_is_split_within_the_chunk_size(extractor):
+    text = " ".join(f"Sentence number {index} is here." for index in range(20))
+    chunks = extractor._chunk({"blocks": [{"type": "text", "text": text}]})
+    assert len(chunks) > 1
+    assert all(len(chunk) <= extractor.chunk_size for chunk in chunks)
+    assert " ".join(chunks).replace("\n", " ") == text
+
+
+def test_a_word_longer_than_a_chunk_is_cut(extractor):
+    chunks = extractor._split("x" * 250)
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+
+
+def test_table_chunks_repeat_the_header(extractor):
+    rows = [["Name", "Price"]] + [[f"item {index}", f"{index} EUR"] for index in range(20)]
+    chunks = extractor._chunk({"tables": [{"caption": "Offers", "rows": rows}]})
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk.startswith("Table: Offers\nName | Price\n")
+
+
+def test_chunk_count_is_capped(extractor):
+    extractor.max_chunks = 3
+    blocks = [{"type": "heading", "text": f"Section {index}"} if index % 2 == 0 else {"type": "text", "text": "body"} for index in range(20)]
+    assert len(extractor._chunk({"blocks": blocks})) == 3
+
+
+def test_bm25_ranks_the_chunk_matching_the_objective_first(extractor):
+    chunks = [
+        "Our company was founded in 1990 and has offices in Rome.",
+        "Flight prices: Rome to Paris 120 euros, Rome to London 150 euros.",
+        "Contact us by email or phone.",
+    ]
+    scores = extractor._lexical_scores(chunks, "find flight prices from Rome")
+    assert max(range(len(chunks)), key=lambda index: scores[index]) == 1
+    assert scores[2] == 0
+
+
+def test_select_relevant_keeps_the_top_chunks_in_page_order(extractor):
+    content = {"title": "Flights", "blocks": [
+        {"type": "heading", "text": "Paris"},
+        {"type": "text", "text": "Flights to Paris cost 120 euros."},
+        {"type": "heading", "text": "About"},
+        {"type": "text", "text": "We are a travel agency."},
+        {"type": "heading", "text": "London"},
+        {"type": "text", "text": "Flights to London cost 150 euros."},
+    ]}
+    text = extractor.select_relevant(content, "flights cost euros")
+    assert text.startswith("<!-- 2 most relevant of 3 content chunks from 'Flights' -->")
+    assert "travel agency" not in text
+    assert text.index("Paris") < text.index("London")
+
+
+def test_select_relevant_reports_missing_content(extractor):
+    assert extractor.select_relevant(None, "anything") == "CONTENT_DISABLED"
+    assert extractor.select_relevant({}, "anything") == "CONTENT_UNAVAILABLE"
+    assert extractor.select_relevant({"blocks": [], "tables": []}, "anything") == "NO_READABLE_CONTENT"
+
+
+def test_embedding_cache_stores_float_arrays_and_evicts_the_least_recent():
+    cache = EmbeddingCache(max_entries=2)
+    cache.put_many("m", ["a", "b"], [[1.0, 0.0], [0.0, 1.0]])
+    cache.get_many("m", ["a"])
+    cache.put_many("m", ["c"], [[0.5, 0.5]])
+    a, b, c = cache.get_many("m", ["a", "b", "c"])
+    assert b is None
+    assert isinstance(a, array) and a.typecode == "f" and list(a) == [1.0, 0.0]
+    assert list(c) == [0.5, 0.5]
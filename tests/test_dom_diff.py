@@ -0,0 +1,56 @@
+from surf_ai.dom_diff import DomDiff
+
+
+def snapshot(elements, url="https://example.com", document_id="doc-1"):
+    return {
+        "documentId": document_id,
+        "url": url,
+        "elements": [{"number": number, "html": html, "summary": f"<a> {html}"} for number, html in elements.items()],
+    }
+
+
+def test_first_render_is_a_full_snapshot():
+    text = DomDiff().render(snapshot({1: "<a>one</a>", 2: "<a>two</a>"}))
+    assert text.startswith("<!-- Visible Interactive Elements (2) -->")
+    assert "<a>one</a>" in text and "<a>two</a>" in text
+
+
+def test_same_page_renders_a_delta():
+    diff = DomDiff()
+    diff.render(snapshot({1: "<a>one</a>", 2: "<a>two</a>", 3: "<a>three</a>"}))
+    text = diff.render(snapshot({1: "<a>one</a>", 2: "<a>TWO</a>", 4: "<a>four</a>"}))
+    assert "1 added, 1 changed, 1 no longer visible, 1 unchanged" in text
+    assert "<a>four</a>" in text and "<a>TWO</a>" in text
+    assert "No longer visible: 3" in text
+    assert "1: <a> <a>one</a>" in text
+    assert "Visible Interactive Elements" not in text
+
+
+def test_unchanged_page_says_so():
+    diff = DomDiff()
+    diff.render(snapshot({1: "<a>one</a>"}))
+    assert "Page unchanged since the previous step" in diff.render(snapshot({1: "<a>one</a>"}))
+
+
+def test_new_document_or_url_renders_a_full_snapshot():
+    diff = DomDiff()
+    diff.render(snapshot({1: "<a>one</a>"}))
+    assert "Visible Interactive Elements" in diff.render(snapshot({1: "<a>one</a>"}, document_id="doc-2"))
+    assert "Visible Interactive Elements" in diff.render(snapshot({1: "<a>one</a>"}, document_id="doc-2", url="https://example.com/b"))
+
+
+def test_reset_forces_a_full_snapshot():
+    diff = DomDiff()
+    diff.render(snapshot({1: "<a>one</a>"}))
+    diff.reset()
+    assert "Visible Interactive Elements" in diff.render(snapshot({1: "<a>one</a>"}))
+
+
+def test_fingerprint_follows_the_rendered_state():
+    diff = DomDiff()
+    diff.render(snapshot({1: "<a>one</a>"}))
+    first = diff.fingerprint()
+    diff.render(snapshot({1: "<a>one</a>"}))
+    assert diff.fingerprint() == first
+    diff.render(snapshot({1: "<a>changed</a>"}))
+    assert diff.fingerprint() != first
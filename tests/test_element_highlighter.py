@@ -0,0 +1,74 @@
+import logging
+import pytest
+
+sync_api = pytest.importorskip("playwright.sync_api")
+
+from surf_ai.element_highlighter import ElementHighlighter
+
+PRODUCTS = """
+<ul id="products">
+  <li>Apple <button>Add to cart</button></li>
+  <li>Pear <button>Add to cart</button></li>
+</ul>
+<div id="cards">
+  <div><a href="/view">View</a></div>
+  <div><a href="/view">View</a></div>
+  <div><a href="/view">View</a></div>
+</div>
+"""
+
+
+@pytest.fixture(scope="module")
+def page():
+    with sync_api.sync_playwright() as playwright:
+        try:
+            browser = playwright.chromium.launch(headless=True)
+        except Exception as e:
+            pytest.skip(f"Chromium is not available: {e}")
+        page = browser.new_page()
+        yield page
+        browser.close()
+
+
+@pytest.fixture
+def highlighter():
+    return ElementHighlighter(logging.getLogger(__name__))
+
+
+def highlight(page, highlighter):
+    highlighter.remove_highlight(page)
+    highlighter.apply_highlight(page)
+
+
+def numbers(page, selector):
+    return page.evaluate(
+        "selector => Array.from(document.querySelectorAll(selector)).map(el => "
+        "[el.parentElement.firstChild.textContent.trim(), parseInt(el.dataset.highlightNumber, 10)])",
+        selector
+    )
+
+
+def test_numbers_follow_list_items_across_a_re_sort(page, highlighter):
+    page.set_content(PRODUCTS)
+    highlight(page, highlighter)
+    before = dict(numbers(page, "#products button"))
+
+    page.evaluate("""() => {
+        const list = document.getElementById('products');
+        list.innerHTML = '<li>Pear <button>Add to cart</button></li><li>Apple <button>Add to cart</button></li>';
+    }""")
+    highlight(page, highlighter)
+    assert dict(numbers(page, "#products button")) == before
+
+
+def test_identical_controls_never_inherit_another_element_number(page, highlighter):
+    page.set_content(PRODUCTS)
+    highlight(page, highlighter)
+    before = {number for _, number in numbers(page, "#cards a")}
+    assert len(before) == 3
+
+    page.evaluate("() => { const cards = document.getElementById('cards'); cards.innerHTML = cards.innerHTML; }")
+    highlight(page, highlighter)
+    after = {number for _, number in numbers(page, "#cards a")}
+    assert len(after) == 3
+    assert not before & after
@@ -0,0 +1,46 @@
+import json
+import pytest
+
+pytest.importorskip("playwright")
+
+from surf_ai import engine
+from surf_ai.engine import SurfAiEngine
+
+
+@pytest.mark.parametrize("plan", [
+    [],
+    {},
+    {"tasks": []},
+    {"branches": []},
+    {"branches": [{"branch_name": "a"}]},
+    {"branches": [{"branch_name": "a", "objective": "  "}]},
+    {"branches": "compare prices", "tasks": [{"task_name": "open"}]},
+])
+def test_invalid_plans_are_rejected(plan):
+    with pytest.raises(ValueError):
+        SurfAiEngine._validate_plan(plan)
+
+
+@pytest.mark.parametrize("plan", [
+    {"tasks": [{"task_name": "open"}]},
+    {"branches": [], "tasks": [{"task_name": "open"}]},
+    {"branches": [{"branch_name": "a", "objective": "find the price on a.com"}]},
+])
+def test_valid_plans_are_accepted(plan):
+    SurfAiEngine._validate_plan(plan)
+
+
+def test_an_invalid_plan_is_requested_again(monkeypatch):
+    monkeypatch.setenv("SURF_AI_CHECKPOINTS", "0")
+    responses = iter([
+        json.dumps({"branches": [{"branch_name": "a"}]}),
+        json.dumps({"tasks": [{"task_name": "open", "commands": "page.goto('https://example.com')"}]}),
+    ])
+    monkeypatch.setattr(engine, "call_model", lambda messages, **kwargs: next(responses))
+    surf_engine = SurfAiEngine(browser_pool=object())
+    surf_engine.retry_backoff = 0
+    try:
+        surf_engine._initialize_task("open example.com")
+    finally:
+        surf_engine.close()
+    assert surf_engine.json_task["tasks"][0]["task_name"] == "open"